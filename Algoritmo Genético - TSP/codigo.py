@@ -1,20 +1,81 @@
 import numpy as np
 import requests
 import warnings # Usaremos warnings para suprimir a mensagem de aviso
+import os
+import json
+import hashlib
 
 # 1. Instância do TSP (Matriz de Distâncias)
 URL_TSP_DATA = "https://gist.github.com/rodrigoclira/1cc3dfc603740decb4269096aa7ac122/raw/"
+TIMEOUT_DOWNLOAD = 10 # segundos
 
-def carregar_matriz_distancias(url):
+# Cache local compartilhado com "Algoritmo do TSP (Experimentos)/codigo.py":
+# index.json mapeia a URL para um arquivo .npy nomeado pelo hash do conteúdo.
+DIRETORIO_CACHE = os.environ.get('TSP_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'teia_tsp'))
+
+def _ler_indice_cache(diretorio):
+    """
+    Lê o índice URL -> arquivo do cache (vazio se não existir).
+    """
+    try:
+        with open(os.path.join(diretorio, 'index.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def carregar_matriz_do_cache(url, diretorio=None):
+    """
+    Mapeia em memória (mmap) a matriz baixada de 'url', ou retorna None se não estiver no cache.
+    """
+    diretorio = diretorio or DIRETORIO_CACHE
+    entrada = _ler_indice_cache(diretorio).get(url)
+    if entrada is None:
+        return None
+    try:
+        return np.load(os.path.join(diretorio, entrada['file']), mmap_mode='r')
+    except (OSError, ValueError, KeyError):
+        return None
+
+def salvar_matriz_no_cache(url, conteudo, matriz, diretorio=None):
+    """
+    Salva a matriz baixada como .npy, com nome dado pelo hash SHA-256 do conteúdo.
+    """
+    diretorio = diretorio or DIRETORIO_CACHE
+    hash_conteudo = hashlib.sha256(conteudo).hexdigest()
+    nome_arquivo = f"{hash_conteudo}.npy"
+    try:
+        os.makedirs(diretorio, exist_ok=True)
+        np.save(os.path.join(diretorio, nome_arquivo), matriz)
+        indice = _ler_indice_cache(diretorio)
+        indice[url] = {'sha256': hash_conteudo, 'file': nome_arquivo, 'shape': list(matriz.shape)}
+        temporario = os.path.join(diretorio, f"index.{os.getpid()}.tmp")
+        with open(temporario, 'w') as f:
+            json.dump(indice, f, indent=2)
+        os.replace(temporario, os.path.join(diretorio, 'index.json'))
+    except OSError as e:
+        print(f"Não foi possível salvar os dados TSP no cache: {e}")
+
+def carregar_matriz_distancias(url, timeout=TIMEOUT_DOWNLOAD, diretorio_cache=None, atualizar=False):
     """
-    Baixa a matriz de distâncias no formato JSON/Array.
+    Carrega a matriz de distâncias priorizando o cache local (offline first).
+
+    Se a URL já estiver no cache, a matriz é mapeada do disco sem acessar a rede
+    (a menos que atualizar=True). Caso contrário ela é baixada no formato
+    JSON/Array, com timeout, e salva no cache. Se o download falhar, tenta o
+    cache e, por último, a matriz de fallback de 5 cidades.
     """
+    if not atualizar:
+        matriz = carregar_matriz_do_cache(url, diretorio_cache)
+        if matriz is not None:
+            print(f"Dados TSP carregados do cache: {len(matriz)} cidades.")
+            return matriz
+
     # ⚠️ Desabilita os avisos (warnings) gerados por 'verify=False'
     warnings.filterwarnings('ignore', message='Unverified HTTPS request')
     
     try:
         # AQUI ESTÁ A CORREÇÃO: Usar verify=False
-        response = requests.get(url, verify=False) 
+        response = requests.get(url, verify=False, timeout=timeout) 
         
         response.raise_for_status() 
         
@@ -24,9 +85,15 @@ def carregar_matriz_distancias(url):
         
         print(f"Dados TSP carregados com sucesso: {num_cidades} cidades.")
         
-        return np.array(matriz_distancias_list)
+        matriz = np.array(matriz_distancias_list)
+        salvar_matriz_no_cache(url, response.content, matriz, diretorio_cache)
+        return matriz
     
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ValueError) as e:
+        matriz = carregar_matriz_do_cache(url, diretorio_cache)
+        if matriz is not None:
+            print(f"Erro ao carregar os dados TSP: {e}. Usando a cópia do cache.")
+            return matriz
         # Se a conexão falhar mesmo com verify=False (improvável), usa a fallback
         print(f"Erro ao carregar os dados TSP (após ignorar SSL): {e}")
         print("Usando matriz de fallback (5 cidades: A, B, C, D, E).")
@@ -38,12 +105,35 @@ def carregar_matriz_distancias(url):
             [10, 25, 42, 24,  0]   # E
         ])
 
-# Carrega a matriz global
-DISTANCIA_MATRIX = carregar_matriz_distancias(URL_TSP_DATA)
-
+# A matriz global (DISTANCIA_MATRIX) e NUM_CIDADES só são carregadas no primeiro
+# uso, assim importar este módulo nunca fica esperando a rede.
 # Mapeamento para cidades (se for a matriz de 5x5 do fallback, senão usa índices)
 # Como a matriz carregada tem 10 cidades, vamos trabalhar apenas com índices (0 a 9)
-NUM_CIDADES = DISTANCIA_MATRIX.shape[0]
+
+def obter_matriz_distancias():
+    """
+    Retorna a matriz global, carregando-a na primeira chamada.
+    """
+    global DISTANCIA_MATRIX, NUM_CIDADES
+    if 'DISTANCIA_MATRIX' not in globals():
+        DISTANCIA_MATRIX = carregar_matriz_distancias(URL_TSP_DATA)
+        NUM_CIDADES = DISTANCIA_MATRIX.shape[0]
+    return DISTANCIA_MATRIX
+
+def obter_num_cidades():
+    """
+    Retorna o número de cidades da matriz global.
+    """
+    if 'NUM_CIDADES' not in globals():
+        obter_matriz_distancias()
+    return NUM_CIDADES
+
+def __getattr__(nome):
+    # Acesso externo a codigo.DISTANCIA_MATRIX / codigo.NUM_CIDADES dispara o carregamento
+    if nome in ('DISTANCIA_MATRIX', 'NUM_CIDADES'):
+        obter_matriz_distancias()
+        return globals()[nome]
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
 
 # ==============================================================================
 # Funções de Validação e Fitness
@@ -60,14 +150,15 @@ def validar_rota(cromossomo):
     """
     
     # 1. Verificar o tamanho (deve ter N-1 cidades)
+    num_cidades = obter_num_cidades()
     cidades_no_cromossomo = len(cromossomo)
-    cidades_esperadas = NUM_CIDADES - 1
+    cidades_esperadas = num_cidades - 1
     
     if cidades_no_cromossomo != cidades_esperadas:
         return False, f"Tamanho incorreto: Esperado {cidades_esperadas}, Encontrado {cidades_no_cromossomo}."
     
     # 2. Verificar se há cidades repetidas ou faltando
-    cidades_esperadas_indices = set(range(1, NUM_CIDADES)) # Cidades de 1 até N-1 (Cid 0 é fixada)
+    cidades_esperadas_indices = set(range(1, num_cidades)) # Cidades de 1 até N-1 (Cid 0 é fixada)
     cidades_no_cromossomo_set = set(cromossomo)
     
     if cidades_no_cromossomo_set != cidades_esperadas_indices:
@@ -87,6 +178,7 @@ def calcular_fitness_distancia(cromossomo):
     # A rota sempre começa e termina na cidade 0 (índice)
     rota_completa = [0] + list(cromossomo) + [0]
     
+    matriz = obter_matriz_distancias()
     distancia_total = 0
     
     # Percorre de par em par
@@ -94,8 +186,9 @@ def calcular_fitness_distancia(cromossomo):
         cidade_atual = rota_completa[i]
         proxima_cidade = rota_completa[i+1]
         
-        # Acessa a distância na matriz global
-        distancia_total += DISTANCIA_MATRIX[cidade_atual, proxima_cidade]
+        # Acessa a distância na matriz global; .item() converte para int/float do Python,
+        # para que a soma não estoure se o cache tiver uma matriz de dtype estreito (ex.: int16)
+        distancia_total += matriz[cidade_atual, proxima_cidade].item()
         
     return distancia_total
 
@@ -138,6 +231,9 @@ class Individuo:
 
 if __name__ == '__main__':
     
+    DISTANCIA_MATRIX = obter_matriz_distancias()
+    NUM_CIDADES = obter_num_cidades()
+
     print("\n--- TESTE DE PREPARAÇÃO TSP/AG ---")
     print(f"Matriz de Distâncias carregada. Número de cidades: {NUM_CIDADES} (índices 0 a {NUM_CIDADES-1})")
     
@@ -0,0 +1,241 @@
+'''
+Microbenchmarks for the GA operators of codigo.py.
+
+Every operator, a full generation and a short run_ga call are timed over a
+grid of synthetic instances (random cities in a square, no download needed)
+and population sizes. Results can be stored as a JSON baseline and compared
+against a previous baseline to flag regressions:
+
+    python benchmark.py --save baseline.json
+    python benchmark.py --baseline baseline.json --threshold 0.2
+'''
+
+import argparse
+import json
+import platform
+import sys
+import time
+import numpy as np
+from typing import List, Dict, Any, Tuple, Callable, Optional
+
+import codigo
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+QUICK_SIZES = [10, 100, 1000]
+DEFAULT_POP_SIZES = [50, 200]
+DENSE_LIMIT = 2000 # Larger instances use a CoordinateInstance instead of a dense matrix
+DEFAULT_THRESHOLD = 0.10 # Relative slowdown reported as a regression
+
+# --- Synthetic instances ---
+
+def synthetic_instance(num_cities: int, seed: int = 0):
+    """Random cities in a 1000x1000 square with rounded Euclidean distances."""
+    coords = np.random.default_rng(seed).uniform(0, 1000, size=(num_cities, 2))
+    instance = codigo.CoordinateInstance(coords, 'EUC_2D')
+    if num_cities <= DENSE_LIMIT:
+        return instance[0:num_cities]
+    return instance
+
+# --- Timing ---
+
+def time_call(function: Callable[[], Any], repeat: int = 5, min_time: float = 0.05) -> float:
+    """Returns the best time per call in seconds."""
+    # Like timeit's autorange: double the calls until one measurement takes min_time
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2
+    best = elapsed
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        best = min(best, time.perf_counter() - start)
+    return best / number
+
+# --- Benchmarks ---
+# Each setup receives (pop_size, rng) on the current instance and returns the callable to time.
+
+def _individual_benchmarks() -> Dict[str, Callable]:
+    """Operators whose cost depends only on the number of cities."""
+    def fitness(pop_size, rng):
+        individual = codigo.create_individual()
+        return lambda: codigo.calculate_fitness(individual)
+
+    def crossover(pop_size, rng):
+        parent1, parent2 = codigo.create_individual(), codigo.create_individual()
+        return lambda: codigo.ordered_crossover(parent1, parent2)
+
+    def mutation(pop_size, rng):
+        individual = codigo.create_individual()
+        return lambda: codigo.swap_mutation(individual, 0.05)
+
+    def mutation_delta(pop_size, rng):
+        individual = codigo.create_individual()
+        fitness_value = codigo.calculate_fitness(individual)
+        return lambda: codigo.swap_mutation_delta(individual, fitness_value, 0.05)
+
+    return {
+        'calculate_fitness': fitness,
+        'ordered_crossover': crossover,
+        'swap_mutation': mutation,
+        'swap_mutation_delta': mutation_delta
+    }
+
+def _population_benchmarks() -> Dict[str, Callable]:
+    """Operators, a full generation and a short run, per population size."""
+    def selection(pop_size, rng):
+        population = [codigo.create_individual() for _ in range(pop_size)]
+        fitnesses = [codigo.calculate_fitness(individual) for individual in population]
+        return lambda: [codigo.tournament_selection(population, fitnesses, 3) for _ in range(pop_size)]
+
+    def selection_batch(pop_size, rng):
+        fitnesses = codigo.evaluate_population(codigo.create_population(pop_size, rng))
+        return lambda: codigo.tournament_selection_batch(fitnesses, pop_size, 3, rng)
+
+    def evaluation(pop_size, rng):
+        population = codigo.create_population(pop_size, rng)
+        return lambda: codigo.evaluate_population(population)
+
+    def crossover_batch(pop_size, rng):
+        population = codigo.create_population(pop_size, rng)
+        pairs = pop_size // 2
+        starts, ends = codigo.draw_cut_points(pairs, population.shape[1], rng)
+        return lambda: codigo.ordered_crossover_batch(population[:pairs], population[pairs:2 * pairs],
+                                                      starts, ends)
+
+    def mutation_batch(pop_size, rng):
+        population = codigo.create_population(pop_size, rng)
+        fitnesses = codigo.evaluate_population(population)
+        return lambda: codigo.swap_mutation_batch(population, fitnesses, 0.05, rng)
+
+    def generation(pop_size, rng):
+        state = {'population': codigo.create_population(pop_size, rng)}
+        state['fitnesses'] = codigo.evaluate_population(state['population'])
+        elite_size = max(1, pop_size // 20)
+        def step():
+            state['population'], state['fitnesses'] = codigo.next_generation(
+                state['population'], state['fitnesses'], elite_size, 3, 0.05, rng)
+        return step
+
+    def ga_run(pop_size, rng):
+        params = dict(codigo.BASE_PARAMS, pop_size=pop_size, generations=5, seed=0)
+        return lambda: codigo.run_ga(params)
+
+    return {
+        'tournament_selection': selection,
+        'tournament_selection_batch': selection_batch,
+        'evaluate_population': evaluation,
+        'ordered_crossover_batch': crossover_batch,
+        'swap_mutation_batch': mutation_batch,
+        'next_generation': generation,
+        'run_ga': ga_run
+    }
+
+def benchmark_key(name: str, num_cities: int, pop_size: Optional[int] = None) -> str:
+    key = f"{name}/n={num_cities}"
+    return key if pop_size is None else f"{key}/pop={pop_size}"
+
+def run_benchmarks(sizes: List[int] = DEFAULT_SIZES, pop_sizes: List[int] = DEFAULT_POP_SIZES,
+                   operators: Optional[List[str]] = None, repeat: int = 5,
+                   min_time: float = 0.05, seed: int = 0) -> Dict[str, float]:
+    """Times every benchmark on every instance size; returns {key: seconds per call}."""
+    individual, population = _individual_benchmarks(), _population_benchmarks()
+    unknown = set(operators or []) - set(individual) - set(population)
+    if unknown:
+        raise ValueError(f"Unknown benchmarks {sorted(unknown)}, expected some of "
+                         f"{sorted(individual) + sorted(population)}")
+    selected = lambda benchmarks: {name: setup for name, setup in benchmarks.items()
+                                   if operators is None or name in operators}
+
+    # The active instance is restored afterwards
+    previous = codigo.DISTANCE_MATRIX if 'DISTANCE_MATRIX' in vars(codigo) else None
+    results = {}
+    try:
+        for num_cities in sizes:
+            codigo.set_instance(synthetic_instance(num_cities, seed))
+            configurations = [(name, setup, None) for name, setup in selected(individual).items()]
+            configurations += [(name, setup, pop_size) for name, setup in selected(population).items()
+                               for pop_size in pop_sizes]
+            for name, setup, pop_size in configurations:
+                rng = np.random.default_rng(seed)
+                function = setup(pop_size, rng)
+                key = benchmark_key(name, num_cities, pop_size)
+                results[key] = time_call(function, repeat, min_time)
+                print(f"  {key}: {results[key] * 1e6:.1f} us")
+    finally:
+        if previous is not None:
+            codigo.set_instance(previous)
+    return results
+
+# --- Baselines ---
+
+def save_baseline(results: Dict[str, float], path: str) -> None:
+    """Writes the results, together with the environment they were measured in, as JSON."""
+    baseline = {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'date': time.strftime('%Y-%m-%d %H:%M:%S')
+        },
+        'results': results
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+
+def load_baseline(path: str) -> Dict[str, float]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)['results']
+
+def compare_results(results: Dict[str, float], baseline: Dict[str, float],
+                    threshold: float = DEFAULT_THRESHOLD) -> Tuple[List[Tuple[str, float]], List[Tuple[str, float]]]:
+    """Returns (regressions, improvements) as (key, current/baseline ratio) lists, largest change first."""
+    ratios = [(key, results[key] / baseline[key]) for key in sorted(results)
+              if key in baseline and baseline[key] > 0]
+    regressions = sorted([(key, ratio) for key, ratio in ratios if ratio > 1 + threshold],
+                         key=lambda item: -item[1])
+    improvements = sorted([(key, ratio) for key, ratio in ratios if ratio < 1 / (1 + threshold)],
+                          key=lambda item: item[1])
+    return regressions, improvements
+
+# --- Command line ---
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the TSP genetic algorithm.")
+    parser.add_argument('--sizes', type=int, nargs='+', help=f"number of cities (default {DEFAULT_SIZES})")
+    parser.add_argument('--pop-sizes', type=int, nargs='+', default=DEFAULT_POP_SIZES)
+    parser.add_argument('--operators', nargs='+', help="only run these benchmarks")
+    parser.add_argument('--quick', action='store_true', help=f"use sizes {QUICK_SIZES} and fewer repeats")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--save', metavar='PATH', help="store the results as a JSON baseline")
+    parser.add_argument('--baseline', metavar='PATH', help="compare against a stored baseline")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown reported as a regression (default %(default)s)")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or (QUICK_SIZES if args.quick else DEFAULT_SIZES)
+    repeat = 3 if args.quick else args.repeat
+    results = run_benchmarks(sizes, args.pop_sizes, args.operators, repeat)
+    if args.save:
+        save_baseline(results, args.save)
+        print(f"Baseline saved to '{args.save}'")
+    if args.baseline:
+        regressions, improvements = compare_results(results, load_baseline(args.baseline), args.threshold)
+        for key, ratio in improvements:
+            print(f"  faster: {key} ({ratio:.2f}x)")
+        for key, ratio in regressions:
+            print(f"  REGRESSION: {key} ({ratio:.2f}x)")
+        print(f"{len(regressions)} regressions, {len(improvements)} improvements "
+              f"(threshold {args.threshold:.0%})")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
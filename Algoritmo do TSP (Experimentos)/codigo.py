@@ -9,35 +9,358 @@ import requests
 import warnings
 import random
 import time
-from typing import List, Dict, Any, Tuple
+import os
+import itertools
+import json
+import hashlib
+import cProfile
+import tracemalloc
+import heapq
+from collections import deque, OrderedDict, Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Dict, Any, Tuple, Optional
 
 # --- 1. TSP Problem Definition (Reused from previous activity) ---
 
 URL_TSP_DATA = "https://gist.github.com/rodrigoclira/1cc3dfc603740decb4269096aa7ac122/raw/"
+DOWNLOAD_TIMEOUT = 10 # seconds
+CACHE_DIR = os.environ.get('TSP_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'teia_tsp'))
+
+FALLBACK_MATRIX = np.array([
+    [0, 20, 42, 35, 10],
+    [20, 0, 30, 34, 25],
+    [42, 30, 0, 12, 42],
+    [35, 34, 12, 0, 24],
+    [10, 25, 42, 24, 0]
+])
+
+def _read_cache_index(cache_dir: str) -> Dict[str, Any]:
+    """Reads the url -> cached instance index of the cache directory."""
+    try:
+        with open(os.path.join(cache_dir, 'index.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_cache_index(cache_dir: str, index: Dict[str, Any]) -> None:
+    """Replaces the index of the cache directory atomically."""
+    temporary = os.path.join(cache_dir, f"index.{os.getpid()}.tmp")
+    with open(temporary, 'w') as f:
+        json.dump(index, f, indent=2)
+    os.replace(temporary, os.path.join(cache_dir, 'index.json'))
+
+def load_cached_matrix(url: str, cache_dir: Optional[str] = None) -> Optional[np.ndarray]:
+    """Memory-maps the compact copy of the matrix cached for url, or returns None on a miss."""
+    cache_dir = cache_dir or CACHE_DIR
+    index = _read_cache_index(cache_dir)
+    entry = index.get(url)
+    if entry is None:
+        return None
+    try:
+        # The original stays as downloaded for the other modules sharing the cache; the compact copy has its own file
+        compact_file = entry.get('compact') or f"{entry['sha256']}.compact.npy"
+        compact_path = os.path.join(cache_dir, compact_file)
+        if not os.path.exists(compact_path):
+            original = np.load(os.path.join(cache_dir, entry['file']), mmap_mode='r')
+            temporary = os.path.join(cache_dir, f"{compact_file}.{os.getpid()}.tmp")
+            with open(temporary, 'wb') as f:
+                np.save(f, compact_distance_matrix(original))
+            os.replace(temporary, compact_path)
+        if entry.get('compact') != compact_file:
+            index[url] = dict(entry, compact=compact_file)
+            _write_cache_index(cache_dir, index)
+        return np.load(compact_path, mmap_mode='r')
+    except (OSError, ValueError, KeyError):
+        return None
+
+def store_cached_matrix(url: str, content: bytes, matrix: np.ndarray, cache_dir: Optional[str] = None) -> None:
+    """Stores a downloaded matrix, as downloaded, in a .npy file named after its content hash."""
+    cache_dir = cache_dir or CACHE_DIR
+    content_hash = hashlib.sha256(content).hexdigest()
+    file_name = f"{content_hash}.npy"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        np.save(os.path.join(cache_dir, file_name), matrix)
+        index = _read_cache_index(cache_dir)
+        index[url] = {'sha256': content_hash, 'file': file_name, 'shape': list(matrix.shape)}
+        _write_cache_index(cache_dir, index)
+    except OSError as e:
+        print(f"Could not cache TSP data: {e}")
+
+def load_distance_matrix(url: str, timeout: float = DOWNLOAD_TIMEOUT, cache_dir: Optional[str] = None,
+                         refresh: bool = False) -> np.ndarray:
+    """Loads the distance matrix: from the on-disk cache first, then the network, then the 5-city fallback."""
+    if not refresh:
+        cached = load_cached_matrix(url, cache_dir)
+        if cached is not None:
+            print(f"TSP data loaded from cache: {len(cached)} cities.")
+            return cached
 
-def load_distance_matrix(url: str) -> np.ndarray:
-    """Loads the distance matrix from a JSON endpoint."""
     warnings.filterwarnings('ignore', message='Unverified HTTPS request')
     try:
-        response = requests.get(url, verify=False)
+        response = requests.get(url, verify=False, timeout=timeout)
         response.raise_for_status()
         matrix_list = response.json()
         print(f"TSP data loaded successfully: {len(matrix_list)} cities.")
-        return np.array(matrix_list)
+        matrix = np.array(matrix_list)
+        store_cached_matrix(url, response.content, matrix, cache_dir)
+        cached = load_cached_matrix(url, cache_dir)
+        return cached if cached is not None else compact_distance_matrix(matrix)
     except Exception as e:
+        cached = load_cached_matrix(url, cache_dir)
+        if cached is not None:
+            print(f"Error loading TSP data: {e}. Using cached copy ({len(cached)} cities).")
+            return cached
         print(f"Error loading TSP data: {e}. Using fallback 5-city matrix.")
-        fallback_matrix = np.array([
-            [0, 20, 42, 35, 10],
-            [20, 0, 30, 34, 25],
-            [42, 30, 0, 12, 42],
-            [35, 34, 12, 0, 24],
-            [10, 25, 42, 24, 0]
-        ])
+        fallback_matrix = compact_distance_matrix(FALLBACK_MATRIX)
         print(f"Fallback matrix shape: {fallback_matrix.shape}")
         return fallback_matrix
 
-DISTANCE_MATRIX = load_distance_matrix(URL_TSP_DATA)
-NUM_CITIES = DISTANCE_MATRIX.shape[0]
+# --- Coordinate-based instances (TSPLIB EUC_2D / CEIL_2D / ATT / GEO) ---
+
+COORDINATE_METRICS = ('EUC_2D', 'CEIL_2D', 'ATT', 'GEO', 'EUCLIDEAN')
+GEO_RADIUS = 6378.388
+
+class CoordinateInstance:
+    """TSP instance stored as city coordinates, with distances computed on demand."""
+
+    # cache_rows only speeds up row() callers, i.e. the lower bound above BOUND_DENSE_LIMIT
+    # cities; the pairwise lookups of the fitness and local search are computed directly
+    def __init__(self, coords, metric: str = 'EUC_2D', cache_rows: int = 0):
+        if metric not in COORDINATE_METRICS:
+            raise ValueError(f"Unknown metric '{metric}', expected one of {COORDINATE_METRICS}")
+        self.coords = np.asarray(coords, dtype=float)
+        self.metric = metric
+        self.cache_rows = cache_rows
+        self.shape = (len(self.coords), len(self.coords))
+        self.ndim = 2
+        self.dtype = np.dtype(float) if metric == 'EUCLIDEAN' else np.dtype(np.int64)
+        self._rows = OrderedDict()
+        if metric == 'GEO':
+            # TSPLIB: DDD.MM coordinates, degrees truncated as in the reference codes
+            degrees = np.trunc(self.coords)
+            self._radians = np.pi * (degrees + 5.0 * (self.coords - degrees) / 3.0) / 180.0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_rows'] = OrderedDict() # The row cache is not shipped to workers
+        return state
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def distances(self, i, j) -> np.ndarray:
+        """Vectorized distance between the cities in i and j (broadcast together)."""
+        i = np.asarray(i)
+        j = np.asarray(j)
+        if self.metric == 'GEO':
+            latitude, longitude = self._radians[i, 0], self._radians[i, 1]
+            other_latitude, other_longitude = self._radians[j, 0], self._radians[j, 1]
+            q1 = np.cos(longitude - other_longitude)
+            q2 = np.cos(latitude - other_latitude)
+            q3 = np.cos(latitude + other_latitude)
+            arc = np.arccos(np.clip(0.5 * ((1.0 + q1) * q2 - (1.0 - q1) * q3), -1.0, 1.0))
+            d = np.floor(GEO_RADIUS * arc + 1.0)
+            return np.where(i == j, 0, d).astype(self.dtype)
+
+        difference = self.coords[i] - self.coords[j]
+        squared = np.einsum('...k,...k->...', difference, difference)
+        if self.metric == 'EUC_2D':
+            return np.floor(np.sqrt(squared) + 0.5).astype(self.dtype)
+        if self.metric == 'CEIL_2D':
+            return np.ceil(np.sqrt(squared)).astype(self.dtype)
+        if self.metric == 'ATT':
+            pseudo = np.sqrt(squared / 10.0)
+            rounded = np.floor(pseudo + 0.5)
+            return np.where(rounded < pseudo, rounded + 1, rounded).astype(self.dtype)
+        return np.sqrt(squared)
+
+    def row(self, i: int) -> np.ndarray:
+        """Distances from city i to every city, served from the LRU cache when hot."""
+        i = int(i)
+        cached = self._rows.get(i)
+        if cached is not None:
+            self._rows.move_to_end(i)
+            return cached
+        row = self.distances(i, np.arange(self.shape[0]))
+        if self.cache_rows > 0:
+            self._rows[i] = row
+            if len(self._rows) > self.cache_rows:
+                self._rows.popitem(last=False)
+        return row
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            i, j = key
+            if np.isscalar(i) and np.isscalar(j):
+                # Scalar lookups read cached rows (every metric is symmetric, so the row of j
+                # serves too) but never fill the cache: at 10k cities a row costs as much as
+                # ~50 scalar lookups, more than local search makes from one city per pass
+                for city, other in ((int(i), j), (int(j), i)):
+                    cached = self._rows.get(city)
+                    if cached is not None:
+                        return cached[other]
+                return self.distances(i, j)[()]
+            return self.distances(i, j)
+        if isinstance(key, slice):
+            rows = np.arange(self.shape[0])[key]
+            return self.distances(rows[:, None], np.arange(self.shape[0])[None, :])
+        return self.row(key)
+
+    def nearest_neighbors(self, k: int) -> Optional[np.ndarray]:
+        """k nearest cities of every city using a KD-tree, or None without scipy."""
+        try:
+            from scipy.spatial import cKDTree
+        except ImportError:
+            return None
+        points = self.coords
+        if self.metric == 'GEO':
+            # Chord length on the unit sphere grows with the great-circle distance
+            latitude, longitude = self._radians[:, 0], self._radians[:, 1]
+            points = np.column_stack([np.cos(latitude) * np.cos(longitude),
+                                      np.cos(latitude) * np.sin(longitude), np.sin(latitude)])
+        _, neighbors = cKDTree(points).query(points, k=k + 1)
+        return np.asarray(neighbors[:, 1:], dtype=np.intp)
+
+def load_tsplib_coordinates(path: str, cache_rows: int = 0) -> CoordinateInstance:
+    """Loads a TSPLIB file with a NODE_COORD_SECTION as a CoordinateInstance."""
+    header = {}
+    coords = []
+    with open(path) as f:
+        lines = iter(f)
+        for line in lines:
+            line = line.strip()
+            if line.startswith('NODE_COORD_SECTION'):
+                break
+            if ':' in line:
+                key, value = line.split(':', 1)
+                header[key.strip().upper()] = value.strip()
+        for line in lines:
+            fields = line.split()
+            if not fields or fields[0] == 'EOF':
+                break
+            coords.append([float(fields[1]), float(fields[2])])
+
+    metric = header.get('EDGE_WEIGHT_TYPE', 'EUC_2D').upper()
+    if metric not in COORDINATE_METRICS:
+        raise ValueError(f"Unsupported EDGE_WEIGHT_TYPE '{metric}' in {path}")
+    if not coords:
+        raise ValueError(f"No NODE_COORD_SECTION found in {path}")
+    instance = CoordinateInstance(coords, metric, cache_rows)
+    print(f"TSP coordinates loaded successfully: {len(instance)} cities ({metric}).")
+    return instance
+
+def is_symmetric(matrix) -> bool:
+    """Tells whether d(i, j) == d(j, i) for the given instance."""
+    if isinstance(matrix, (CoordinateInstance, CondensedMatrix)):
+        return True
+    return np.array_equal(matrix, np.transpose(matrix))
+
+# --- Compact distance storage ---
+
+COMPACT_INTEGER_DTYPES = (np.int16, np.int32, np.int64)
+
+def narrowest_dtype(matrix) -> np.dtype:
+    """Smallest dtype (int16/32/64, else float32/64) that holds every distance exactly."""
+    values = np.asarray(matrix)
+    if values.size == 0:
+        return values.dtype
+    integral = np.issubdtype(values.dtype, np.integer) or \
+        (np.isfinite(values).all() and np.array_equal(values, np.round(values)))
+    if integral:
+        low, high = values.min(), values.max()
+        for dtype in COMPACT_INTEGER_DTYPES:
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                return np.dtype(dtype)
+    if np.array_equal(values.astype(np.float32), values):
+        return np.dtype(np.float32)
+    return np.dtype(np.float64)
+
+class CondensedMatrix:
+    """Symmetric distance matrix stored as its upper triangle, indexable like DISTANCE_MATRIX."""
+
+    def __init__(self, matrix, dtype=None):
+        matrix = np.asarray(matrix)
+        num_cities = matrix.shape[0]
+        if not is_symmetric(matrix):
+            raise ValueError("Only symmetric matrices can be stored condensed")
+        self.shape = (num_cities, num_cities)
+        self.ndim = 2
+        self.dtype = np.dtype(dtype or matrix.dtype)
+        # Row i holds columns i..n-1 and starts at i*n - i*(i-1)/2
+        rows = np.arange(num_cities, dtype=np.int64)
+        self.offsets = rows * num_cities - rows * (rows - 1) // 2 - rows
+        self.data = matrix[np.triu_indices(num_cities)].astype(self.dtype)
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def row(self, i: int) -> np.ndarray:
+        num_cities = self.shape[0]
+        row = np.empty(num_cities, dtype=self.dtype)
+        row[i:] = self.data[self.offsets[i] + i:self.offsets[i] + num_cities]
+        row[:i] = self.data[self.offsets[:i] + i]
+        return row
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            i, j = key
+            return self.data[self.offsets[np.minimum(i, j)] + np.maximum(i, j)]
+        if isinstance(key, slice):
+            rows = np.arange(self.shape[0])[key]
+            return self[rows[:, None], np.arange(self.shape[0])[None, :]]
+        return self.row(key)
+
+    def __array__(self, dtype=None, copy=None):
+        return self[0:self.shape[0]].astype(dtype or self.dtype)
+
+def compact_distance_matrix(matrix, condensed: bool = False):
+    """Stores a distance matrix in its narrowest safe dtype, condensed if asked and symmetric."""
+    if isinstance(matrix, (CoordinateInstance, CondensedMatrix)):
+        return matrix
+    dtype = narrowest_dtype(matrix)
+    if condensed and is_symmetric(matrix):
+        return CondensedMatrix(matrix, dtype)
+    return np.asarray(matrix).astype(dtype)
+
+# DISTANCE_MATRIX and NUM_CITIES are created on first use (see get_distance_matrix),
+# so importing this module never blocks on the network.
+
+def set_instance(distance_matrix, symmetric: Optional[bool] = None) -> None:
+    """Makes distance_matrix the active instance; its symmetry is checked once here unless given."""
+    global DISTANCE_MATRIX, NUM_CITIES, _SYMMETRY
+    DISTANCE_MATRIX = distance_matrix
+    NUM_CITIES = distance_matrix.shape[0]
+    _SYMMETRY = (distance_matrix, is_symmetric(distance_matrix) if symmetric is None else symmetric)
+
+def get_distance_matrix():
+    """Returns the active instance, loading the default one on first use."""
+    if 'DISTANCE_MATRIX' not in globals():
+        set_instance(load_distance_matrix(URL_TSP_DATA))
+    return DISTANCE_MATRIX
+
+def instance_is_symmetric() -> bool:
+    """Tells whether the active instance is symmetric, without rescanning it."""
+    global _SYMMETRY
+    distance_matrix = get_distance_matrix()
+    if '_SYMMETRY' not in globals() or _SYMMETRY[0] is not distance_matrix:
+        # DISTANCE_MATRIX was assigned directly rather than through set_instance
+        _SYMMETRY = (distance_matrix, is_symmetric(distance_matrix))
+    return _SYMMETRY[1]
+
+def get_num_cities() -> int:
+    """Returns the number of cities of the active instance."""
+    if 'NUM_CITIES' not in globals():
+        get_distance_matrix()
+    return NUM_CITIES
+
+def __getattr__(name: str):
+    # Lazy module attributes: codigo.DISTANCE_MATRIX triggers the first load
+    if name in ('DISTANCE_MATRIX', 'NUM_CITIES'):
+        get_distance_matrix()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # --- 2. Genetic Algorithm for TSP ---
 
@@ -46,16 +369,57 @@ Population = List[Individual]
 
 def create_individual() -> Individual:
     """Creates a random individual (a permutation of cities)."""
-    cities = list(range(1, NUM_CITIES))
+    cities = list(range(1, get_num_cities()))
     random.shuffle(cities)
     return cities
 
 def calculate_fitness(individual: Individual) -> float:
     """Calculates the total distance of the route. Lower is better."""
     route = [0] + individual + [0]
-    total_distance = sum(DISTANCE_MATRIX[route[i], route[i+1]] for i in range(len(route) - 1))
+    distance_matrix = get_distance_matrix()
+    # .item() widens compact (e.g. int16) entries so the sum cannot overflow
+    total_distance = sum(distance_matrix[route[i], route[i+1]].item() for i in range(len(route) - 1))
     return total_distance
 
+class ScratchBuffers:
+    """Named work arrays reused from one generation to the next."""
+
+    def __init__(self):
+        self._arrays = {}
+
+    def array(self, name: str, shape: Tuple[int, ...], dtype) -> np.ndarray:
+        buffer = self._arrays.get(name)
+        if buffer is None or buffer.dtype != dtype or buffer.shape[1:] != shape[1:] or len(buffer) < shape[0]:
+            buffer = self._arrays[name] = np.empty(shape, dtype=dtype)
+        return buffer[:shape[0]]
+
+def evaluate_population(population, out: Optional[np.ndarray] = None,
+                        scratch: Optional[ScratchBuffers] = None) -> np.ndarray:
+    """Calculates the total distance of every route in the population at once."""
+    tours = np.asarray(population, dtype=np.intp)
+    if tours.ndim == 1:
+        tours = tours.reshape(1, -1)
+    distance_matrix = get_distance_matrix()
+    total_dtype = np.result_type(distance_matrix.dtype, np.int64)
+    if scratch is None:
+        depot = np.zeros((tours.shape[0], 1), dtype=np.intp)
+        routes = np.hstack([depot, tours, depot])
+        return distance_matrix[routes[:, :-1], routes[:, 1:]].sum(axis=1, dtype=total_dtype, out=out)
+
+    count, size = tours.shape
+    routes = scratch.array('routes', (count, size + 2), np.intp)
+    routes[:, 0] = routes[:, -1] = 0
+    routes[:, 1:-1] = tours
+    if not (isinstance(distance_matrix, np.ndarray) and distance_matrix.flags.c_contiguous):
+        return distance_matrix[routes[:, :-1], routes[:, 1:]].sum(axis=1, dtype=total_dtype, out=out)
+    # Flat edge indices i * n + j, gathered with np.take into a reused array
+    edges = scratch.array('edges', (count, size + 1), np.intp)
+    np.multiply(routes[:, :-1], distance_matrix.shape[1], out=edges)
+    edges += routes[:, 1:]
+    lengths = scratch.array('edge_lengths', (count, size + 1), distance_matrix.dtype)
+    np.take(distance_matrix.reshape(-1), edges, out=lengths)
+    return lengths.sum(axis=1, dtype=total_dtype, out=out)
+
 def tournament_selection(population: Population, fitnesses: List[float], k: int) -> Individual:
     """Selects an individual using tournament selection of size k."""
     tournament_indices = random.sample(range(len(population)), k)
@@ -65,34 +429,50 @@ def tournament_selection(population: Population, fitnesses: List[float], k: int)
 def ordered_crossover(parent1: Individual, parent2: Individual) -> Tuple[Individual, Individual]:
     """Performs Ordered Crossover (OX)."""
     size = len(parent1)
-    child1, child2 = [-1]*size, [-1]*size
-
     start, end = sorted(random.sample(range(size), 2))
+    return ox_child(parent1, parent2, start, end), ox_child(parent2, parent1, start, end)
 
-    # Copy the segment from parents to children
-    child1[start:end] = parent1[start:end]
-    child2[start:end] = parent2[start:end]
+def ox_child(segment_parent: Individual, fill_parent: Individual, start: int, end: int) -> Individual:
+    """Builds one OX child in O(n): segment_parent[start:end] in place, the rest in fill_parent order."""
+    segment = segment_parent[start:end]
+    in_segment = set(segment)
+    remaining = [gene for gene in fill_parent if gene not in in_segment]
+    return remaining[:start] + list(segment) + remaining[start:]
 
-    # Fill the rest
-    def fill_child(child, parent):
-        # Get the genes from the parent that are not already in the child
-        parent_genes = [gene for gene in parent if gene not in child[start:end]]
-        
-        # Fill the child with remaining genes in order
-        child_idx = 0
-        for gene in parent_genes:
-            # Find next empty position
-            while child_idx < size and child[child_idx] != -1:
-                child_idx += 1
-            if child_idx < size:
-                child[child_idx] = gene
-        
-        return child
+def ordered_crossover_batch(parents1: np.ndarray, parents2: np.ndarray,
+                            starts: np.ndarray, ends: np.ndarray,
+                            out: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+                            scratch: Optional[ScratchBuffers] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Performs OX for every pair of parents of a generation in one call."""
+    parents1 = np.asarray(parents1)
+    parents2 = np.asarray(parents2)
+    pairs, size = parents1.shape
+    columns = np.arange(size)
+    segment = (columns >= np.asarray(starts)[:, None]) & (columns < np.asarray(ends)[:, None])
+    rows = np.broadcast_to(np.arange(pairs)[:, None], (pairs, size))
+    num_genes = int(max(parents1.max(initial=0), parents2.max(initial=0))) + 1
 
-    child1 = fill_child(child1, parent2)
-    child2 = fill_child(child2, parent1)
-    
-    return child1, child2
+    def fill_children(segment_parents, fill_parents, children):
+        count = len(children)
+        segment_parents, fill_parents = segment_parents[:count], fill_parents[:count]
+        in_row, row_ids = segment[:count], rows[:count]
+        # Membership index: in_segment[r, gene] is True when gene was copied to row r
+        if scratch is None:
+            in_segment = np.zeros((count, num_genes), dtype=bool)
+        else:
+            in_segment = scratch.array('membership', (count, num_genes), bool)
+            in_segment.fill(False)
+        in_segment[row_ids[in_row], segment_parents[in_row]] = True
+        keep = in_segment[row_ids, fill_parents]
+        np.logical_not(keep, out=keep)
+        np.copyto(children, segment_parents, where=in_row)
+        # Every row has as many kept genes as free positions, so the row-major
+        # order of both masks lines them up pair by pair.
+        children[~in_row] = fill_parents[keep]
+        return children
+
+    out1, out2 = out if out is not None else (np.empty_like(parents1), np.empty_like(parents2))
+    return fill_children(parents1, parents2, out1), fill_children(parents2, parents1, out2)
 
 def swap_mutation(individual: Individual, mutation_rate: float) -> Individual:
     """Performs swap mutation."""
@@ -102,371 +482,1934 @@ def swap_mutation(individual: Individual, mutation_rate: float) -> Individual:
             individual[i], individual[j] = individual[j], individual[i]
     return individual
 
+def _edge_length(individual: Individual, edge: int) -> float:
+    """Length of the edge leaving route position `edge` (the depot is position 0)."""
+    origin = individual[edge - 1] if edge > 0 else 0
+    destination = individual[edge] if edge < len(individual) else 0
+    return get_distance_matrix()[origin, destination].item()
+
+def swap_with_delta(individual: Individual, i: int, j: int) -> float:
+    """Swaps genes i and j in place and returns the resulting change in route length."""
+    edges = {i, i + 1, j, j + 1}
+    before = sum(_edge_length(individual, e) for e in edges)
+    individual[i], individual[j] = individual[j], individual[i]
+    after = sum(_edge_length(individual, e) for e in edges)
+    return after - before
+
+def swap_mutation_delta(individual: Individual, fitness: float, mutation_rate: float) -> Tuple[Individual, float]:
+    """Performs swap mutation and keeps the cached route length up to date."""
+    for i in range(len(individual)):
+        if random.random() < mutation_rate:
+            j = random.randint(0, len(individual) - 1)
+            fitness += swap_with_delta(individual, i, j)
+    return individual, fitness
+
+# Batched operators backed by a seeded numpy Generator. The population is a
+# (pop_size, num_cities - 1) integer array and every random decision of a
+# generation is drawn in a handful of calls instead of once per gene/parent.
+
+def create_population(pop_size: int, rng: np.random.Generator, seed_fraction: float = 0.0,
+                      seed_methods: Optional[Tuple[str, ...]] = None) -> np.ndarray:
+    """Creates pop_size individuals as the rows of an integer array, seed_fraction of them by heuristics."""
+    cities = np.tile(np.arange(1, get_num_cities()), (pop_size, 1))
+    population = rng.permuted(cities, axis=1)
+    count = int(round(pop_size * seed_fraction))
+    if count > 0:
+        tours = seeded_tours(count, rng, seed_methods)
+        population[:len(tours)] = tours
+    return population
+
+def tournament_selection_batch(fitnesses: np.ndarray, num_winners: int, k: int,
+                               rng: np.random.Generator) -> np.ndarray:
+    """Runs num_winners tournaments of k distinct contestants at once and returns the winners' indices."""
+    size = len(fitnesses)
+    if k > size:
+        raise ValueError(f"Tournament size {k} is larger than the population ({size})")
+    if 2 * k > size:
+        contestants = np.argsort(rng.random((num_winners, size)), axis=1)[:, :k]
+    else:
+        contestants = rng.integers(0, size, size=(num_winners, k))
+        while True:
+            ordered = np.sort(contestants, axis=1)
+            repeated = np.flatnonzero((ordered[:, 1:] == ordered[:, :-1]).any(axis=1))
+            if len(repeated) == 0:
+                break
+            contestants[repeated] = rng.integers(0, size, size=(len(repeated), k))
+    best = np.argmin(fitnesses[contestants], axis=1) # Minimize distance
+    return contestants[np.arange(num_winners), best]
+
+def draw_cut_points(pairs: int, size: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """Draws two distinct sorted cut points per pair, like sorted(random.sample(range(size), 2))."""
+    if size < 2:
+        return np.zeros(pairs, dtype=int), np.zeros(pairs, dtype=int)
+    first = rng.integers(0, size, size=pairs)
+    second = rng.integers(0, size - 1, size=pairs)
+    second += second >= first
+    return np.minimum(first, second), np.maximum(first, second)
+
+def swap_mutation_batch(population: np.ndarray, fitnesses: np.ndarray, mutation_rate: float,
+                        rng: np.random.Generator, tracker: Optional['DiversityTracker'] = None,
+                        hashes: Optional[np.ndarray] = None,
+                        scratch: Optional[ScratchBuffers] = None) -> None:
+    """Applies swap mutation to every row in place, updating the cached fitnesses (and hashes)."""
+    rows, size = population.shape
+    if scratch is None:
+        mask = rng.random((rows, size)) < mutation_rate
+    else:
+        draws = rng.random(out=scratch.array('mutation_draws', (rows, size), np.float64))
+        mask = np.less(draws, mutation_rate, out=scratch.array('mutation_mask', (rows, size), bool))
+    partners = rng.integers(0, max(size, 1), size=(rows, size))
+    for row, i in zip(*np.nonzero(mask)):
+        j = partners[row, i]
+        if tracker is not None:
+            hashes[row] = tracker.swap_hash(int(hashes[row]), population[row], i, j)
+        fitnesses[row] += swap_with_delta(population[row], i, j)
+
+def next_generation(population: np.ndarray, fitnesses: np.ndarray, elite_size: int,
+                    tournament_size: int, mutation_rate: float,
+                    rng: np.random.Generator, local_search: Optional[str] = None,
+                    neighbors: Optional[List[List[int]]] = None,
+                    cache: Optional['FitnessCache'] = None,
+                    tracker: Optional['DiversityTracker'] = None,
+                    timer: Optional['PhaseTimer'] = None,
+                    out: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+                    use_or_opt: bool = False,
+                    scratch: Optional[ScratchBuffers] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Selection and variation stage: builds the next population and its fitnesses (into `out` if given)."""
+    if timer is None:
+        timer = _NO_TIMER
+    if out is None: # Otherwise a pair of buffers that must not share memory with the inputs
+        out = (np.empty_like(population), np.empty_like(fitnesses))
+    new_population, new_fitnesses = out
+    pop_size, size = population.shape
+    num_children = pop_size - elite_size
+    pairs = (num_children + 1) // 2
+
+    elite_indices = np.argsort(fitnesses)[:elite_size]
+    timer.lap('elitism')
+
+    winners = tournament_selection_batch(fitnesses, 2 * pairs, tournament_size, rng)
+    timer.lap('selection')
+    starts, ends = draw_cut_points(pairs, size, rng)
+    elites, children = new_population[:elite_size], new_population[elite_size:]
+    elite_fitnesses, child_fitnesses = new_fitnesses[:elite_size], new_fitnesses[elite_size:]
+    if scratch is None:
+        parents = population[winners]
+    else:
+        parents = np.take(population, winners, axis=0,
+                          out=scratch.array('parents', (len(winners), size), population.dtype))
+    # Children of the first parents go to the even rows, their siblings to the odd ones
+    ordered_crossover_batch(parents[0::2], parents[1::2], starts, ends,
+                            out=(children[0::2], children[1::2]), scratch=scratch)
+
+    np.take(population, elite_indices, axis=0, out=elites)
+    np.take(fitnesses, elite_indices, out=elite_fitnesses)
+    timer.lap('crossover')
+
+    # Only crossover children are fully evaluated; mutation applies deltas
+    if cache is None:
+        evaluate_population(children, out=child_fitnesses, scratch=scratch)
+    else:
+        if cache.deduplicate:
+            cache.replace_duplicates(children, elites, rng)
+        child_fitnesses[:] = cache.evaluate(children)
+    timer.lap('evaluation')
+
+    child_hashes = None
+    if tracker is not None:
+        elite_hashes = tracker.hashes[elite_indices]
+        child_hashes = tracker.hash_population(children)
+        timer.lap('diversity')
+    swap_mutation_batch(children, child_fitnesses, mutation_rate, rng, tracker, child_hashes, scratch)
+    timer.lap('mutation')
+    if local_search is not None:
+        if local_search not in LOCAL_SEARCH_MODES:
+            raise ValueError(f"Unknown local search '{local_search}', expected one of {LOCAL_SEARCH_MODES}")
+        improve = (children, child_fitnesses) if local_search == 'offspring' else (elites, elite_fitnesses)
+        apply_two_opt(*improve, neighbors, use_or_opt)
+        if tracker is not None:
+            if local_search == 'offspring':
+                child_hashes = tracker.hash_population(children)
+            else:
+                elite_hashes = tracker.hash_population(elites)
+        timer.lap('local_search')
+
+    if tracker is not None:
+        tracker.hashes = np.concatenate([elite_hashes, child_hashes])
+    timer.lap('replacement')
+    return new_population, new_fitnesses
+
+GA_MODES = ('generational', 'steady_state')
+
 def run_ga(params: Dict[str, Any]):
-    """Runs the GA with a given set of parameters."""
+    """Runs the GA with a given set of parameters (see the reference above BASE_PARAMS)."""
+    if params.get('profile_path'):
+        profiler = cProfile.Profile()
+        result = profiler.runcall(run_ga, dict(params, profile_path=None))
+        profiler.dump_stats(params['profile_path'].format(run=run_key(params, instance_fingerprint())[:16]))
+        return result
+    if params.get('trace_memory', False):
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        try:
+            result = run_ga(dict(params, trace_memory=False))
+            result[3]['peak_memory'] = tracemalloc.get_traced_memory()[1] - baseline
+        finally:
+            if started:
+                tracemalloc.stop()
+        return result
+    mode = params.get('mode', 'generational')
+    if mode not in GA_MODES:
+        raise ValueError(f"Unknown mode '{mode}', expected one of {GA_MODES}")
+    if params.get('islands', 1) > 1:
+        if mode != 'generational':
+            raise ValueError(f"The island model runs the generational engine, not '{mode}'")
+        return run_island_ga(params, params.get('island_workers', 1))
+    if mode == 'steady_state':
+        return run_steady_state(params)
+
     pop_size = params['pop_size']
     generations = params.get('generations', 100) # Default generations
     mutation_rate = params['mutation_rate']
     tournament_size = params['tournament_size']
     elite_perc = params['elite_perc']
+    rng = np.random.default_rng(params.get('seed'))
+    local_search = params.get('local_search')
+    neighbors = local_search_neighbors(local_search, params.get('ls_neighbors', 10))
+    use_or_opt = params.get('ls_or_opt', False)
+    cache = None
+    if params.get('cache_size', 0) > 0 or params.get('deduplicate', False):
+        cache = FitnessCache(params.get('cache_size', 0), instance_is_symmetric(),
+                             params.get('deduplicate', False))
 
-    population = [create_individual() for _ in range(pop_size)]
+    population = create_population(pop_size, rng, params.get('seed_fraction', 0.0), params.get('seed_methods'))
     elite_size = int(pop_size * elite_perc)
 
     convergence = []
     diversity = []
+    stats = {}
+    edge_diversity = params.get('edge_diversity', False)
+    if edge_diversity:
+        stats['edge_entropy'] = []
+        stats['edge_distance'] = []
 
-    for _ in range(generations):
-        fitnesses = [calculate_fitness(ind) for ind in population]
+    # Every individual carries its route length; only crossover children are
+    # fully evaluated, mutation updates the cached value incrementally.
+    fitnesses = evaluate_population(population)
+    # Double buffering: each generation is written into the spare arrays,
+    # which then swap roles with the current ones
+    spare = (np.empty_like(population), np.empty_like(fitnesses))
+    scratch = ScratchBuffers()
+    tracker = DiversityTracker(get_num_cities(), instance_is_symmetric())
+    tracker.reset(population)
+    stopping = StoppingCriteria(params)
+    timer = PhaseTimer(params.get('profile_phases', False))
+    evaluations = pop_size
+    generation = 0
+    stop_reason = 'generations'
 
+    for generation in range(generations):
+        timer.start()
         # Data for analysis
-        convergence.append(min(fitnesses))
-        diversity.append(len(set(tuple(ind) for ind in population)))
-
-        new_population = []
-        if elite_size > 0:
-            elite_indices = np.argsort(fitnesses)[:elite_size]
-            new_population.extend([population[i] for i in elite_indices])
-
-        while len(new_population) < pop_size:
-            parent1 = tournament_selection(population, fitnesses, tournament_size)
-            parent2 = tournament_selection(population, fitnesses, tournament_size)
-            
-            child1, child2 = ordered_crossover(parent1, parent2)
-            
-            new_population.append(swap_mutation(child1, mutation_rate))
-            if len(new_population) < pop_size:
-                new_population.append(swap_mutation(child2, mutation_rate))
-        
-        population = new_population
+        convergence.append(fitnesses.min())
+        diversity.append(tracker.distinct())
+        if edge_diversity:
+            entropy, distance = tracker.edge_statistics(population)
+            stats['edge_entropy'].append(entropy)
+            stats['edge_distance'].append(distance)
+        timer.lap('diversity')
+
+        reason = stopping.check(convergence[-1], evaluations, pop_size - elite_size)
+        if reason is not None:
+            stop_reason = reason
+            break
 
-    final_fitnesses = [calculate_fitness(ind) for ind in population]
-    best_fitness = min(final_fitnesses)
+        current = (population, fitnesses)
+        population, fitnesses = next_generation(population, fitnesses, elite_size,
+                                                tournament_size, mutation_rate, rng,
+                                                local_search, neighbors, cache, tracker, timer, spare,
+                                                use_or_opt, scratch)
+        spare = current
+        evaluations += pop_size - elite_size
+        timer.end_generation()
+    else:
+        generation = generations
+
+    best_fitness = fitnesses.min()
+    stats.update({'stop_reason': stop_reason, 'generations': generation, 'evaluations': evaluations})
+    if cache is not None:
+        stats.update(cache.stats())
+    if timer.enabled:
+        stats.update(timer.stats())
+    if 'lower_bound' in params:
+        stats['gap_to_bound'] = (best_fitness - params['lower_bound']) / params['lower_bound']
     
-    return best_fitness, convergence, diversity
+    return best_fitness, convergence, diversity, stats
+
+# --- Steady-state GA ---
+
+def run_steady_state(params: Dict[str, Any]):
+    """Steady-state GA: a few offspring at a time replace the worst individuals in place."""
+    pop_size = params['pop_size']
+    generations = params.get('generations', 100) # Default generations
+    mutation_rate = params['mutation_rate']
+    tournament_size = params['tournament_size']
+    offspring = max(1, params.get('offspring_per_step', 2))
+    rng = np.random.default_rng(params.get('seed'))
+    local_search = params.get('local_search')
+    if local_search not in (None, 'offspring'):
+        raise ValueError(f"Steady-state mode supports only local_search='offspring', not '{local_search}'")
+    neighbors = local_search_neighbors(local_search, params.get('ls_neighbors', 10))
+    use_or_opt = params.get('ls_or_opt', False)
+    symmetric = instance_is_symmetric()
+    cache = None
+    if params.get('cache_size', 0) > 0:
+        cache = FitnessCache(params['cache_size'], symmetric)
+    deduplicate = params.get('deduplicate', False)
+
+    population = create_population(pop_size, rng, params.get('seed_fraction', 0.0), params.get('seed_methods'))
+    fitnesses = evaluate_population(population)
+    size = population.shape[1]
+    # Progress is reported once per period: the evaluations of one run_ga generation
+    period = max(1, pop_size - int(pop_size * params['elite_perc']))
+
+    tracker = DiversityTracker(get_num_cities(), symmetric)
+    tracker.reset(population)
+    counts = Counter(tracker.hashes.tolist())
+    # Max-heap of (fitness, row): the worst row is replaced, the best never is
+    worst_heap = [(-fitness, row) for row, fitness in enumerate(fitnesses.tolist())]
+    heapq.heapify(worst_heap)
+    best_fitness = fitnesses.min()
+
+    convergence = []
+    diversity = []
+    stats = {}
+    edge_diversity = params.get('edge_diversity', False)
+    if edge_diversity:
+        stats['edge_entropy'] = []
+        stats['edge_distance'] = []
+    stopping = StoppingCriteria(params)
+    timer = PhaseTimer(params.get('profile_phases', False))
+    evaluations = pop_size
+    replacements = 0
+    generation = 0
+    stop_reason = 'generations'
+
+    for generation in range(generations):
+        timer.start()
+        convergence.append(best_fitness)
+        diversity.append(len(counts))
+        if edge_diversity:
+            entropy, distance = tracker.edge_statistics(population)
+            stats['edge_entropy'].append(entropy)
+            stats['edge_distance'].append(distance)
+        timer.lap('diversity')
+
+        reason = stopping.check(convergence[-1], evaluations, period)
+        if reason is not None:
+            stop_reason = reason
+            break
+
+        produced = 0
+        while produced < period:
+            count = min(offspring, period - produced)
+            pairs = (count + 1) // 2
+            winners = tournament_selection_batch(fitnesses, 2 * pairs, tournament_size, rng)
+            timer.lap('selection')
+            starts, ends = draw_cut_points(pairs, size, rng)
+            children1, children2 = ordered_crossover_batch(population[winners[0::2]],
+                                                           population[winners[1::2]], starts, ends)
+            children = np.stack([children1, children2], axis=1).reshape(-1, size)[:count]
+            timer.lap('crossover')
+            child_fitnesses = evaluate_population(children) if cache is None else cache.evaluate(children)
+            timer.lap('evaluation')
+            child_hashes = tracker.hash_population(children)
+            swap_mutation_batch(children, child_fitnesses, mutation_rate, rng, tracker, child_hashes)
+            timer.lap('mutation')
+            if local_search is not None:
+                apply_two_opt(children, child_fitnesses, neighbors, use_or_opt)
+                child_hashes = tracker.hash_population(children)
+                timer.lap('local_search')
+
+            for child, fitness, value in zip(children, child_fitnesses.tolist(), child_hashes.tolist()):
+                worst_fitness, worst = worst_heap[0]
+                if fitness >= -worst_fitness or (deduplicate and value in counts):
+                    continue
+                heapq.heapreplace(worst_heap, (-fitness, worst))
+                old_value = int(tracker.hashes[worst])
+                counts[old_value] -= 1
+                if counts[old_value] == 0:
+                    del counts[old_value]
+                counts[value] += 1
+                tracker.hashes[worst] = value
+                population[worst] = child
+                fitnesses[worst] = fitness
+                best_fitness = min(best_fitness, fitnesses[worst])
+                replacements += 1
+            timer.lap('replacement')
+            produced += count
+            evaluations += count
+        timer.end_generation()
+    else:
+        generation = generations
+
+    stats.update({'stop_reason': stop_reason, 'generations': generation, 'evaluations': evaluations,
+                  'replacements': replacements})
+    if cache is not None:
+        stats.update(cache.stats())
+    if timer.enabled:
+        stats.update(timer.stats())
+    if 'lower_bound' in params:
+        stats['gap_to_bound'] = (best_fitness - params['lower_bound']) / params['lower_bound']
+    return best_fitness, convergence, diversity, stats
+
+# --- Instrumentation ---
+
+class PhaseTimer:
+    """Wall time of the GA phases, generation by generation; a disabled timer does nothing."""
+    PHASES = ('diversity', 'elitism', 'selection', 'crossover', 'evaluation', 'mutation',
+              'local_search', 'replacement')
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.times = {phase: [] for phase in self.PHASES}
+        self._current = dict.fromkeys(self.PHASES, 0.0)
+        self._mark = 0.0
+
+    def start(self) -> None:
+        if self.enabled:
+            self._mark = time.perf_counter()
+
+    def lap(self, phase: str) -> None:
+        if self.enabled:
+            now = time.perf_counter()
+            self._current[phase] += now - self._mark
+            self._mark = now
+
+    def end_generation(self) -> None:
+        if self.enabled:
+            for phase in self.PHASES:
+                self.times[phase].append(self._current[phase])
+                self._current[phase] = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'phase_times': self.times,
+            'phase_totals': {phase: float(np.sum(times)) for phase, times in self.times.items()}
+        }
+
+_NO_TIMER = PhaseTimer(enabled=False)
+
+# --- Stopping criteria ---
+
+class StoppingCriteria:
+    """Decides when a run may stop before its generation limit."""
+
+    def __init__(self, params: Dict[str, Any]):
+        self.patience = params.get('patience') # Generations without improvement
+        self.min_improvement = params.get('min_improvement', 0.0) # Relative decrease that counts
+        self.target_fitness = params.get('target_fitness')
+        self.time_limit = params.get('time_limit') # Wall-clock seconds
+        self.max_evaluations = params.get('max_evaluations')
+        self.lower_bound = params.get('lower_bound')
+        self.bound_gap = params.get('bound_gap', 0.0) # Relative distance to lower_bound
+        self.start_time = time.perf_counter()
+        self.best = None
+        self.stagnant = 0
+
+    def check(self, best_fitness: float, evaluations: int, next_cost: int = 0) -> Optional[str]:
+        """Records the current best fitness and returns why to stop, or None to go on."""
+        if self.best is None or self.best - best_fitness > self.min_improvement * abs(self.best):
+            self.best = best_fitness
+            self.stagnant = 0
+        else:
+            self.stagnant += 1
+
+        if self.target_fitness is not None and best_fitness <= self.target_fitness:
+            return 'target'
+        if self.lower_bound is not None and best_fitness <= self.lower_bound * (1 + self.bound_gap):
+            return 'bound'
+        if self.patience is not None and self.stagnant >= self.patience:
+            return 'stagnation'
+        if self.max_evaluations is not None and evaluations + next_cost > self.max_evaluations:
+            return 'evaluations'
+        if self.time_limit is not None and time.perf_counter() - self.start_time >= self.time_limit:
+            return 'time'
+        return None
+
+# --- Fitness memoization with canonical tour keys ---
+
+def canonical_tour(individual, symmetric: bool = True) -> np.ndarray:
+    """Returns one representative of all the encodings of the same cycle."""
+    tour = np.ascontiguousarray(individual, dtype=np.int64)
+    if symmetric and len(tour) > 1 and tour[0] > tour[-1]:
+        tour = np.ascontiguousarray(tour[::-1])
+    return tour
+
+def tour_key(individual, symmetric: bool = True) -> bytes:
+    """128-bit hash of the canonical tour, used as cache and duplicate key."""
+    return hashlib.blake2b(canonical_tour(individual, symmetric).tobytes(), digest_size=16).digest()
+
+class FitnessCache:
+    """Bounded LRU cache of route lengths keyed by canonical tour hash."""
+
+    def __init__(self, maxsize: int = 10000, symmetric: bool = True, deduplicate: bool = False):
+        self.maxsize = maxsize
+        self.symmetric = symmetric
+        self.deduplicate = deduplicate
+        self.hits = 0
+        self.misses = 0
+        self.duplicates_replaced = 0
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def evaluate(self, population: np.ndarray) -> np.ndarray:
+        """Returns the route lengths of population, evaluating only the cache misses."""
+        keys = [tour_key(individual, self.symmetric) for individual in population]
+        fitnesses = np.empty(len(keys), dtype=np.result_type(get_distance_matrix().dtype, np.int64))
+        missing = {} # key -> rows; repeated tours in the batch are evaluated once
+        for row, key in enumerate(keys):
+            cached = self._entries.get(key)
+            if cached is None:
+                missing.setdefault(key, []).append(row)
+            else:
+                self._entries.move_to_end(key)
+                fitnesses[row] = cached
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            first_rows = [rows[0] for rows in missing.values()]
+            for (key, rows), fitness in zip(missing.items(), evaluate_population(population[first_rows])):
+                fitnesses[rows] = fitness
+                if self.maxsize > 0:
+                    self._entries[key] = fitness
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return fitnesses
+
+    def replace_duplicates(self, children: np.ndarray, elites: np.ndarray, rng: np.random.Generator) -> None:
+        """Replaces, in place, children whose cycle already appears among elites or earlier children."""
+        seen = {tour_key(individual, self.symmetric) for individual in elites}
+        for row in range(len(children)):
+            key = tour_key(children[row], self.symmetric)
+            if key in seen:
+                children[row] = rng.permutation(children[row])
+                key = tour_key(children[row], self.symmetric)
+                self.duplicates_replaced += 1
+            seen.add(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters reported next to the run results."""
+        return {
+            'cache_hits': self.hits,
+            'cache_misses': self.misses,
+            'cache_hit_rate': self.hit_rate,
+            'duplicates_replaced': self.duplicates_replaced
+        }
+
+# --- Population diversity: incremental tour hashes and edge statistics ---
+
+HASH_MASK = (1 << 64) - 1
+
+class DiversityTracker:
+    """Keeps one 64-bit Zobrist hash per individual so diversity is cheap to measure."""
+
+    def __init__(self, num_cities: int, symmetric: bool = True, seed: int = 0x5EED):
+        rng = np.random.default_rng(seed)
+        self.city_keys = rng.integers(0, 2**64 - 1, size=num_cities, dtype=np.uint64, endpoint=True)
+        self.position_keys = rng.integers(0, 2**64 - 1, size=max(num_cities - 1, 1), dtype=np.uint64,
+                                          endpoint=True) | np.uint64(1)
+        self._city_keys = [int(key) for key in self.city_keys]
+        self._position_keys = [int(key) for key in self.position_keys]
+        self.num_cities = num_cities
+        self.symmetric = symmetric
+        self.hashes = np.empty(0, dtype=np.uint64)
+
+    def hash_population(self, population: np.ndarray) -> np.ndarray:
+        """Hashes every row of the population at once."""
+        population = np.asarray(population)
+        if population.shape[1] == 0:
+            return np.zeros(len(population), dtype=np.uint64)
+        terms = self.city_keys[population] * self.position_keys[:population.shape[1]]
+        return np.bitwise_xor.reduce(terms, axis=1)
+
+    def reset(self, population: np.ndarray) -> None:
+        """Hashes a whole population from scratch."""
+        self.hashes = self.hash_population(population)
+
+    def _term(self, city: int, position: int) -> int:
+        return (self._city_keys[city] * self._position_keys[position]) & HASH_MASK
+
+    def swap_hash(self, value: int, individual, i: int, j: int) -> int:
+        """Hash of individual after swapping positions i and j (call before the swap)."""
+        if i == j:
+            return value
+        a, b = int(individual[i]), int(individual[j])
+        return value ^ self._term(a, i) ^ self._term(b, j) ^ self._term(b, i) ^ self._term(a, j)
+
+    def distinct(self) -> int:
+        """Number of distinct tours in the tracked population."""
+        return len(np.unique(self.hashes))
+
+    def _edge_ids(self, population: np.ndarray) -> np.ndarray:
+        tours = np.asarray(population)
+        depot = np.zeros((len(tours), 1), dtype=tours.dtype)
+        routes = np.hstack([depot, tours, depot])
+        origin, destination = routes[:, :-1], routes[:, 1:]
+        if self.symmetric:
+            origin, destination = np.minimum(origin, destination), np.maximum(origin, destination)
+        return (origin.astype(np.int64) * self.num_cities + destination).ravel()
+
+    def edge_frequency_matrix(self, population: np.ndarray) -> np.ndarray:
+        """(n, n) matrix counting how many tours use each edge (upper triangle when symmetric)."""
+        counts = np.bincount(self._edge_ids(population), minlength=self.num_cities ** 2)
+        return counts.reshape(self.num_cities, self.num_cities)
+
+    def edge_statistics(self, population: np.ndarray) -> Tuple[float, float]:
+        """Returns the normalized edge entropy and the mean pairwise edge distance."""
+        pop_size = len(population)
+        edges_per_tour = population.shape[1] + 1
+        if pop_size < 2:
+            return 0.0, 0.0
+        ids = self._edge_ids(population)
+        if self.num_cities ** 2 <= 2**25:
+            counts = np.bincount(ids, minlength=self.num_cities ** 2)
+            counts = counts[counts > 0]
+        else:
+            counts = np.unique(ids, return_counts=True)[1]
+        p = counts / (pop_size * edges_per_tour)
+        entropy = -np.sum(p * np.log(p))
+        normalized_entropy = min(max((entropy - np.log(edges_per_tour)) / np.log(pop_size), 0.0), 1.0)
+        shared_pairs = np.sum(counts * (counts - 1.0)) / (pop_size * (pop_size - 1.0))
+        return float(normalized_entropy), float(edges_per_tour - shared_pairs)
+
+# --- Memetic local search: 2-opt with neighbor lists ---
+
+LOCAL_SEARCH_MODES = ('offspring', 'elites')
+
+def nearest_neighbors(k: int, block_size: Optional[int] = None) -> np.ndarray:
+    """Returns the k nearest cities of every city, closest first."""
+    distance_matrix = get_distance_matrix()
+    num_cities = get_num_cities()
+    k = min(k, num_cities - 1)
+    if isinstance(distance_matrix, CoordinateInstance):
+        neighbors = distance_matrix.nearest_neighbors(k)
+        if neighbors is not None:
+            return neighbors
+    block_size = block_size or max(1, min(1024, 2**22 // max(num_cities, 1)))
+    neighbors = np.empty((num_cities, k), dtype=np.intp)
+    for start in range(0, num_cities, block_size):
+        stop = min(start + block_size, num_cities)
+        block = np.array(distance_matrix[start:stop], dtype=float)
+        block[np.arange(stop - start), np.arange(start, stop)] = np.inf
+        candidates = np.argpartition(block, k - 1, axis=1)[:, :k] if k < num_cities - 1 else \
+            np.argsort(block, axis=1)[:, :k]
+        order = np.argsort(np.take_along_axis(block, candidates, axis=1), axis=1, kind='stable')
+        neighbors[start:stop] = np.take_along_axis(candidates, order, axis=1)
+    return neighbors
+
+def local_search_neighbors(local_search: Optional[str], k: int) -> Optional[List[List[int]]]:
+    """Validates the local search option and precomputes its neighbor lists."""
+    if local_search is None:
+        return None
+    if local_search not in LOCAL_SEARCH_MODES:
+        raise ValueError(f"Unknown local search '{local_search}', expected one of {LOCAL_SEARCH_MODES}")
+    if not instance_is_symmetric():
+        raise ValueError("2-opt local search requires a symmetric distance matrix")
+    return nearest_neighbors(k).tolist()
+
+class ArrayTour:
+    """Cyclic tour stored as an order array plus a position index, with shorter-side reversals."""
+
+    def __init__(self, cities):
+        self.order = np.array(cities, dtype=np.intp)
+        self.position = np.empty(len(self.order), dtype=np.intp)
+        self.position[self.order] = np.arange(len(self.order))
+        self.flipped = False
+
+    @classmethod
+    def from_individual(cls, individual) -> 'ArrayTour':
+        """Tour of a GA individual (the depot, city 0, is implicit at the start)."""
+        return cls([0] + [int(city) for city in individual])
+
+    def to_individual(self) -> Individual:
+        """The tour as a GA individual: cities after the depot, in tour order."""
+        order = self.order[::-1].tolist() if self.flipped else self.order.tolist()
+        depot = order.index(0)
+        return order[depot + 1:] + order[:depot]
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def next(self, city: int) -> int:
+        step = -1 if self.flipped else 1
+        return self.order[(self.position[city] + step) % len(self.order)].item()
+
+    def prev(self, city: int) -> int:
+        step = 1 if self.flipped else -1
+        return self.order[(self.position[city] + step) % len(self.order)].item()
+
+    def between(self, a: int, b: int, c: int) -> bool:
+        """Tells whether b lies on the path from a forward to c (both ends included)."""
+        if self.flipped:
+            a, c = c, a
+        i, j, k = self.position[a], self.position[b], self.position[c]
+        if i <= k:
+            return i <= j <= k
+        return j >= i or j <= k
+
+    def reverse(self, a: int, b: int) -> None:
+        """Reverses the path from a forward to b."""
+        if self.flipped:
+            a, b = b, a
+        n = len(self.order)
+        i, j = self.position[a], self.position[b]
+        length = (j - i) % n + 1
+        if 2 * length > n:
+            # Reversing the rest of the cycle and the reading direction is equivalent and shorter
+            self.flipped = not self.flipped
+            if length == n:
+                return
+            i, j, length = (j + 1) % n, (i - 1) % n, n - length
+        indices = np.arange(i, j + 1) if i <= j else np.arange(i, i + length) % n
+        segment = self.order[indices[::-1]]
+        self.order[indices] = segment
+        self.position[segment] = indices
+
+    def two_opt_move(self, a: int, b: int, c: int, d: int) -> None:
+        """Replaces the edges (a, b) and (c, d), with b = next(a) and d = next(c), by (a, c) and (b, d)."""
+        self.reverse(b, c)
+
+    def or_opt_move(self, s1: int, s2: int, p: int, reverse: bool = False) -> None:
+        """Moves the path s1..s2 between p and next(p) (p outside the path, not prev(s1))."""
+        e = self.next(s2)
+        self.reverse(s1, p)
+        self.reverse(p, e)
+        if not reverse:
+            self.reverse(s2, s1)
+
+def _two_opt_pass(tour: ArrayTour, fitness: float, neighbors: List[List[int]]) -> float:
+    """Applies improving 2-opt moves to tour until none is left; returns the new length."""
+    distance_matrix = get_distance_matrix()
+    active = deque(tour.order.tolist())
+    look = [True] * len(tour) # Don't-look bit is off while the city is queued
+    while active:
+        a = active.popleft()
+        look[a] = False
+        for successor in (True, False):
+            b = tour.next(a) if successor else tour.prev(a)
+            d_ab = distance_matrix[a, b].item()
+            move = None
+            for c in neighbors[a]:
+                d_ac = distance_matrix[a, c].item()
+                if d_ac >= d_ab:
+                    break
+                d = tour.next(c) if successor else tour.prev(c)
+                if c == b or d == a:
+                    continue
+                delta = d_ac + distance_matrix[b, d].item() - d_ab - distance_matrix[c, d].item()
+                if delta < 0:
+                    move = (c, d, delta)
+                    break
+            if move is None:
+                continue
+
+            c, d, delta = move
+            # Replacing (a, b) and (c, d) by (a, c) and (b, d)
+            if successor:
+                tour.two_opt_move(a, b, c, d)
+            else:
+                tour.two_opt_move(b, a, d, c)
+            fitness += delta
+            for city in (a, b, c, d):
+                if not look[city]:
+                    look[city] = True
+                    active.append(city)
+            break
+    return fitness
+
+def _or_opt_pass(tour: ArrayTour, fitness: float, neighbors: List[List[int]], max_segment: int = 3) -> float:
+    """Applies improving Or-opt moves (segments of up to max_segment cities) until none is left."""
+    distance_matrix = get_distance_matrix()
+    distance = lambda i, j: distance_matrix[i, j].item()
+    n = len(tour)
+    active = deque(tour.order.tolist())
+    look = [True] * n
+    while active:
+        s1 = active.popleft()
+        look[s1] = False
+        s2 = s1
+        for length in range(1, min(max_segment, n - 3) + 1):
+            if length > 1:
+                s2 = tour.next(s2)
+            a, e = tour.prev(s1), tour.next(s2)
+            removal = distance(a, s1) + distance(s2, e) - distance(a, e)
+            move = None
+            for end, other in ((s1, s2), (s2, s1)):
+                for p in neighbors[end]:
+                    d_pe = distance(p, end)
+                    if d_pe >= removal:
+                        break
+                    if tour.between(s1, p, s2):
+                        continue
+                    for q in (tour.next(p), tour.prev(p)):
+                        if tour.between(s1, q, s2):
+                            continue
+                        delta = d_pe + distance(other, q) - distance(p, q) - removal
+                        if delta < 0:
+                            move = (p, q, end, delta)
+                            break
+                    if move is not None:
+                        break
+                if move is not None:
+                    break
+            if move is None:
+                continue
+
+            p, q, end, delta = move
+            # Insert between p and q as p-end..other-q; or_opt_move wants q = next(p)
+            if q == tour.next(p):
+                tour.or_opt_move(s1, s2, p, reverse=end != s1)
+            else:
+                tour.or_opt_move(s1, s2, q, reverse=end == s1)
+            fitness += delta
+            for city in (a, e, p, q, s1, s2):
+                if not look[city]:
+                    look[city] = True
+                    active.append(city)
+            break
+    return fitness
+
+def two_opt(individual: Individual, fitness: float, neighbors: List[List[int]]) -> Tuple[Individual, float]:
+    """Improves a tour with neighbor-list 2-opt until no improving move is left."""
+    if len(individual) < 3:
+        return individual, fitness
+    tour = ArrayTour.from_individual(individual)
+    fitness = _two_opt_pass(tour, fitness, neighbors)
+    return tour.to_individual(), fitness
+
+def or_opt(individual: Individual, fitness: float, neighbors: List[List[int]],
+           max_segment: int = 3) -> Tuple[Individual, float]:
+    """Improves a tour with Or-opt: moves segments of up to max_segment cities elsewhere."""
+    if len(individual) < 4:
+        return individual, fitness
+    tour = ArrayTour.from_individual(individual)
+    fitness = _or_opt_pass(tour, fitness, neighbors, max_segment)
+    return tour.to_individual(), fitness
+
+def local_search_tour(individual: Individual, fitness: float, neighbors: List[List[int]],
+                      use_or_opt: bool = False) -> Tuple[Individual, float]:
+    """2-opt, alternated with Or-opt until neither improves when use_or_opt is set."""
+    if not use_or_opt or len(individual) < 4:
+        return two_opt(individual, fitness, neighbors)
+    tour = ArrayTour.from_individual(individual)
+    fitness = _two_opt_pass(tour, fitness, neighbors)
+    while True:
+        improved = _or_opt_pass(tour, fitness, neighbors)
+        if improved >= fitness:
+            break
+        fitness = _two_opt_pass(tour, improved, neighbors)
+    return tour.to_individual(), fitness
+
+def apply_two_opt(population: np.ndarray, fitnesses: np.ndarray, neighbors: List[List[int]],
+                  use_or_opt: bool = False) -> None:
+    """Applies two_opt (and Or-opt with use_or_opt) to every row of the population in place."""
+    for row in range(len(population)):
+        tour, fitnesses[row] = local_search_tour(population[row], fitnesses[row], neighbors, use_or_opt)
+        population[row] = tour
+
+# --- Constructive heuristics for seeding the initial population ---
+
+SEED_METHODS = ('nearest_neighbor', 'greedy_edge', 'space_filling_curve')
+
+def _as_individual(cycle: np.ndarray) -> np.ndarray:
+    """Rotates a cycle over all cities so that it starts at the depot, which is then dropped."""
+    depot = int(np.flatnonzero(cycle == 0)[0])
+    return np.roll(cycle, -depot)[1:]
+
+def nearest_neighbor_tours(starts) -> np.ndarray:
+    """Nearest neighbor tours from several start cities, built side by side."""
+    distance_matrix = get_distance_matrix()
+    num_cities = get_num_cities()
+    starts = np.asarray(starts, dtype=np.intp)
+    count = len(starts)
+    tours = np.empty((count, num_cities), dtype=np.intp)
+    tours[:, 0] = starts
+    visited = np.zeros((count, num_cities))
+    visited[np.arange(count), starts] = np.inf
+    columns = np.arange(num_cities)[None, :]
+    current = starts
+    for step in range(1, num_cities):
+        distances = distance_matrix[current[:, None], columns] + visited
+        current = distances.argmin(axis=1)
+        visited[np.arange(count), current] = np.inf
+        tours[:, step] = current
+    return np.array([_as_individual(tour) for tour in tours]).reshape(count, num_cities - 1)
+
+def greedy_edge_tour(k: int = 10) -> np.ndarray:
+    """Greedy edge heuristic on the k-nearest-neighbor candidate edges."""
+    distance_matrix = get_distance_matrix()
+    num_cities = get_num_cities()
+    if num_cities < 3:
+        return np.arange(1, num_cities)
+    neighbors = nearest_neighbors(k)
+    first = np.repeat(np.arange(num_cities), neighbors.shape[1])
+    second = neighbors.ravel()
+    edges = np.unique(np.column_stack([np.minimum(first, second), np.maximum(first, second)]), axis=0)
+    lengths = np.minimum(distance_matrix[edges[:, 0], edges[:, 1]], distance_matrix[edges[:, 1], edges[:, 0]])
+
+    parent = list(range(num_cities))
+    def find(city):
+        while parent[city] != city:
+            parent[city] = parent[parent[city]]
+            city = parent[city]
+        return city
+
+    degree = [0] * num_cities
+    adjacent = [[] for _ in range(num_cities)]
+    for a, b in edges[np.argsort(lengths, kind='stable')].tolist():
+        if degree[a] < 2 and degree[b] < 2:
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[root_a] = root_b
+                degree[a] += 1
+                degree[b] += 1
+                adjacent[a].append(b)
+                adjacent[b].append(a)
+
+    paths = []
+    seen = [False] * num_cities
+    for city in range(num_cities):
+        if degree[city] < 2 and not seen[city]:
+            path = [city]
+            seen[city] = True
+            while True:
+                following = [c for c in adjacent[path[-1]] if not seen[c]]
+                if not following:
+                    break
+                path.append(following[0])
+                seen[following[0]] = True
+            paths.append(path)
+
+    cycle = list(paths.pop(0))
+    while paths:
+        heads = np.array([path[0] for path in paths])
+        tails = np.array([path[-1] for path in paths])
+        end = cycle[-1]
+        to_heads = np.asarray(distance_matrix[end, heads], dtype=float)
+        to_tails = np.asarray(distance_matrix[end, tails], dtype=float)
+        if to_heads.min() <= to_tails.min():
+            cycle.extend(paths.pop(int(to_heads.argmin())))
+        else:
+            cycle.extend(reversed(paths.pop(int(to_tails.argmin()))))
+    cycle = np.array(cycle)
+    forward, backward = _as_individual(cycle), _as_individual(cycle[::-1])
+    if instance_is_symmetric():
+        return forward
+    return min(forward, backward, key=lambda tour: evaluate_population(tour)[0])
+
+def hilbert_index(points: np.ndarray, order: int = 16) -> np.ndarray:
+    """Position of every 2D point along a Hilbert curve over a 2^order grid (vectorized over points)."""
+    points = np.asarray(points, dtype=float)
+    low, high = points.min(axis=0), points.max(axis=0)
+    side = 1 << order
+    grid = ((points - low) / np.where(high > low, high - low, 1) * (side - 1)).astype(np.int64)
+    x, y = grid[:, 0].copy(), grid[:, 1].copy()
+    index = np.zeros(len(points), dtype=np.int64)
+    scale = side // 2
+    while scale > 0:
+        rx = (x & scale) > 0
+        ry = (y & scale) > 0
+        index += scale * scale * ((3 * rx) ^ ry)
+        # Rotate the quadrant so the curve is continuous
+        flip = ~ry & rx
+        x[flip] = side - 1 - x[flip]
+        y[flip] = side - 1 - y[flip]
+        swap = ~ry
+        x[swap], y[swap] = y[swap], x[swap]
+        scale //= 2
+    return index
+
+def space_filling_curve_tour() -> Optional[np.ndarray]:
+    """Visits the cities in Hilbert curve order, or returns None without coordinates."""
+    distance_matrix = get_distance_matrix()
+    if not isinstance(distance_matrix, CoordinateInstance):
+        return None
+    return _as_individual(np.argsort(hilbert_index(distance_matrix.coords), kind='stable'))
+
+def seeded_tours(count: int, rng: np.random.Generator,
+                 methods: Optional[Tuple[str, ...]] = None) -> np.ndarray:
+    """Builds up to count distinct tours with the constructive heuristics in methods."""
+    methods = SEED_METHODS if methods is None else methods
+    unknown = set(methods) - set(SEED_METHODS)
+    if unknown:
+        raise ValueError(f"Unknown seeding methods {sorted(unknown)}, expected some of {SEED_METHODS}")
+    candidates = []
+    if 'greedy_edge' in methods:
+        candidates.append(greedy_edge_tour())
+    if 'space_filling_curve' in methods:
+        tour = space_filling_curve_tour()
+        if tour is not None:
+            candidates.append(tour)
+    if 'nearest_neighbor' in methods and count > len(candidates):
+        starts = rng.choice(get_num_cities(), size=min(count - len(candidates), get_num_cities()), replace=False)
+        candidates.extend(nearest_neighbor_tours(starts))
+
+    symmetric = instance_is_symmetric()
+    tours, keys = [], set()
+    for tour in candidates:
+        key = tour_key(tour, symmetric)
+        if key not in keys and len(tours) < count:
+            keys.add(key)
+            tours.append(tour)
+    return np.array(tours, dtype=np.intp).reshape(len(tours), get_num_cities() - 1)
+
+# --- Island model: subpopulations evolving on separate cores ---
+
+TOPOLOGIES = ('ring', 'full')
+
+def _evolve_island(state: Tuple[np.ndarray, np.ndarray, np.random.Generator, Optional['FitnessCache']],
+                   generations: int, elite_size: int, tournament_size: int, mutation_rate: float,
+                   local_search: Optional[str] = None, neighbors: Optional[List[List[int]]] = None,
+                   use_or_opt: bool = False, profile_phases: bool = False):
+    """Evolves one island for a number of generations (executed in a worker)."""
+    population, fitnesses, rng, cache = state
+    tracker = DiversityTracker(get_num_cities(), instance_is_symmetric())
+    tracker.reset(population)
+    timer = PhaseTimer(profile_phases)
+    scratch = ScratchBuffers()
+    convergence = []
+    hashes = []
+    for _ in range(generations):
+        timer.start()
+        convergence.append(fitnesses.min())
+        hashes.append(tracker.hashes)
+        timer.lap('diversity')
+        population, fitnesses = next_generation(population, fitnesses, elite_size,
+                                                tournament_size, mutation_rate, rng,
+                                                local_search, neighbors, cache, tracker, timer,
+                                                use_or_opt=use_or_opt, scratch=scratch)
+        timer.end_generation()
+    return (population, fitnesses, rng, cache), convergence, hashes, timer.times
+
+def migrate(states: List[Tuple[np.ndarray, np.ndarray, np.random.Generator]], migrants: int,
+            topology: str) -> None:
+    """Copies the best individuals of each island over the worst ones of its neighbours."""
+    if topology not in TOPOLOGIES:
+        raise ValueError(f"Unknown topology '{topology}', expected one of {TOPOLOGIES}")
+    num_islands = len(states)
+    outgoing = []
+    for population, fitnesses, *_ in states:
+        best = np.argsort(fitnesses)[:migrants]
+        outgoing.append((population[best].copy(), fitnesses[best].copy()))
+
+    for target, (population, fitnesses, *_) in enumerate(states):
+        if topology == 'ring':
+            sources = [(target - 1) % num_islands]
+        else:
+            sources = [i for i in range(num_islands) if i != target]
+        incoming = [outgoing[i] for i in sources if i != target]
+        if not incoming:
+            continue
+        tours = np.concatenate([tours for tours, _ in incoming])
+        tour_fitnesses = np.concatenate([f for _, f in incoming])
+        count = min(len(tours), len(population) - 1)
+        worst = np.argsort(fitnesses)[len(population) - count:]
+        population[worst] = tours[:count]
+        fitnesses[worst] = tour_fitnesses[:count]
+
+def run_island_ga(params: Dict[str, Any], workers: Optional[int] = None):
+    """Runs the GA as an island model and returns the same outputs as run_ga."""
+    pop_size = params['pop_size']
+    generations = params.get('generations', 100)
+    mutation_rate = params['mutation_rate']
+    tournament_size = params['tournament_size']
+    elite_size = int(pop_size * params['elite_perc'])
+    num_islands = params.get('islands', 4)
+    interval = max(1, params.get('migration_interval', 10))
+    migrants = params.get('migrants', 1)
+    topology = params.get('topology', 'ring')
+    if topology not in TOPOLOGIES:
+        raise ValueError(f"Unknown topology '{topology}', expected one of {TOPOLOGIES}")
+    local_search = params.get('local_search')
+    neighbors = local_search_neighbors(local_search, params.get('ls_neighbors', 10))
+    use_or_opt = params.get('ls_or_opt', False)
+    profile_phases = params.get('profile_phases', False)
+    use_cache = params.get('cache_size', 0) > 0 or params.get('deduplicate', False)
+
+    states = []
+    for seed in np.random.SeedSequence(params.get('seed')).spawn(num_islands):
+        rng = np.random.default_rng(seed)
+        population = create_population(pop_size, rng, params.get('seed_fraction', 0.0),
+                                       params.get('seed_methods'))
+        cache = None
+        if use_cache:
+            cache = FitnessCache(params.get('cache_size', 0), instance_is_symmetric(),
+                                 params.get('deduplicate', False))
+        states.append((population, evaluate_population(population), rng, cache))
+
+    workers = min(workers or os.cpu_count() or 1, num_islands)
+    pool = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(get_distance_matrix(), instance_is_symmetric()))
+
+    convergence = []
+    diversity = []
+    timer = PhaseTimer(profile_phases) # Phase times summed over the islands
+    stopping = StoppingCriteria(params)
+    evaluations = num_islands * pop_size
+    step_cost = num_islands * (pop_size - elite_size)
+    stop_reason = 'generations'
+    try:
+        done = 0
+        while done < generations and stop_reason == 'generations':
+            epoch = min(interval, generations - done)
+            args = (epoch, elite_size, tournament_size, mutation_rate, local_search, neighbors,
+                    use_or_opt, profile_phases)
+            if pool is None:
+                outcomes = [_evolve_island(state, *args) for state in states]
+            else:
+                futures = [pool.submit(_evolve_island, state, *args) for state in states]
+                outcomes = [future.result() for future in futures]
+
+            states = [state for state, _, _, _ in outcomes]
+            for g in range(epoch):
+                convergence.append(min(island_convergence[g] for _, island_convergence, _, _ in outcomes))
+                hashes = np.concatenate([island_hashes[g] for _, _, island_hashes, _ in outcomes])
+                diversity.append(len(np.unique(hashes)))
+                reason = stopping.check(convergence[-1], evaluations, step_cost)
+                if reason is not None:
+                    stop_reason = reason
+                    break
+                evaluations += step_cost
+                if timer.enabled:
+                    for phase, times in timer.times.items():
+                        times.append(sum(island_times[phase][g] for _, _, _, island_times in outcomes))
+
+            done += epoch
+            if done < generations and stop_reason == 'generations':
+                migrate(states, migrants, topology)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    if stop_reason == 'generations':
+        best_fitness = min(fitnesses.min() for _, fitnesses, _, _ in states)
+        generation = generations
+    else:
+        # The islands ran on to the end of the epoch; report the run as of the stop
+        best_fitness = convergence[-1]
+        generation = len(convergence) - 1
+    stats = {'stop_reason': stop_reason, 'generations': generation, 'evaluations': evaluations}
+    if use_cache:
+        caches = [cache for _, _, _, cache in states]
+        hits, misses = sum(cache.hits for cache in caches), sum(cache.misses for cache in caches)
+        stats.update({'cache_hits': hits, 'cache_misses': misses,
+                      'cache_hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+                      'duplicates_replaced': sum(cache.duplicates_replaced for cache in caches)})
+    if timer.enabled:
+        stats.update(timer.stats())
+    if 'lower_bound' in params:
+        stats['gap_to_bound'] = (best_fitness - params['lower_bound']) / params['lower_bound']
+    return best_fitness, convergence, diversity, stats
+
+# --- Exact reference: Held-Karp dynamic programming for small instances ---
+
+HELD_KARP_LIMIT = 20 # Largest instance solved exactly: 2^19 subsets x 19 end cities
+_OPTIMA: Dict[str, float] = {} # instance fingerprint -> optimal tour length
+
+def held_karp(distance_matrix=None) -> Tuple[float, Individual]:
+    """Solves the instance exactly by bitmask dynamic programming; returns (optimum, tour)."""
+    distance_matrix = get_distance_matrix() if distance_matrix is None else distance_matrix
+    num_cities = distance_matrix.shape[0]
+    if num_cities > HELD_KARP_LIMIT:
+        raise ValueError(f"Held-Karp is limited to {HELD_KARP_LIMIT} cities, the instance has {num_cities}")
+    integral = np.issubdtype(distance_matrix.dtype, np.integer)
+    distances = np.asarray(distance_matrix[0:num_cities], dtype=float)
+    size = num_cities - 1
+    if size == 0:
+        return distance_matrix[0, 0], []
+
+    full = 1 << size
+    cost = np.full((full, size), np.inf)
+    parent = np.full((full, size), -1, dtype=np.int8)
+    cities = np.arange(size)
+    cost[1 << cities, cities] = distances[0, 1:]
+    masks = np.arange(full)
+    popcount = np.zeros(full, dtype=np.int8)
+    for city in cities:
+        popcount += (masks >> city) & 1
+
+    inner = distances[1:, 1:]
+    for subset_size in range(2, size + 1):
+        layer = masks[popcount == subset_size]
+        for city in cities:
+            ending = layer[(layer >> city) & 1 == 1]
+            candidates = cost[ending ^ (1 << city)] + inner[:, city]
+            best = candidates.argmin(axis=1)
+            parent[ending, city] = best
+            cost[ending, city] = candidates[np.arange(len(ending)), best]
+
+    closing = cost[full - 1] + distances[1:, 0]
+    city = int(closing.argmin())
+    optimum = closing[city]
+    tour = []
+    mask = full - 1
+    while city >= 0:
+        tour.append(city + 1)
+        mask, city = mask ^ (1 << city), int(parent[mask, city])
+    tour.reverse()
+    return (int(round(optimum)) if integral else float(optimum)), tour
+
+def _cached_instance_value(file_name: str, memory: Dict[str, float], compute, distance_matrix=None,
+                           cache_dir: Optional[str] = None) -> float:
+    """Returns compute(distance_matrix), computed once per instance fingerprint."""
+    fingerprint = instance_fingerprint(distance_matrix)
+    if fingerprint in memory:
+        return memory[fingerprint]
+    path = os.path.join(cache_dir or CACHE_DIR, file_name)
+    try:
+        with open(path) as f:
+            values = json.load(f)
+    except (OSError, ValueError):
+        values = {}
+    if fingerprint not in values:
+        values[fingerprint] = compute(distance_matrix)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporary = f"{path}.{os.getpid()}.tmp"
+            with open(temporary, 'w') as f:
+                json.dump(values, f, indent=2, default=_to_json)
+            os.replace(temporary, path)
+        except OSError as e:
+            print(f"Could not cache {file_name}: {e}")
+    memory[fingerprint] = values[fingerprint]
+    return memory[fingerprint]
+
+def optimal_tour_length(distance_matrix=None, cache_dir: Optional[str] = None) -> float:
+    """Returns the optimum of a small instance, solving it once per instance (cached in optima.json)."""
+    return _cached_instance_value('optima.json', _OPTIMA, lambda matrix: held_karp(matrix)[0],
+                                  distance_matrix, cache_dir)
+
+# --- Lower bound: Held-Karp 1-tree relaxation with subgradient optimization ---
+
+_BOUNDS: Dict[str, float] = {} # instance fingerprint -> lower bound
+
+BOUND_DENSE_LIMIT = 5000 # Coordinate instances up to this size are expanded to a float32 matrix
+
+def _symmetric_rows(distance_matrix):
+    """Returns row(i) giving the distances from city i, symmetrized as min(D, D.T) if needed."""
+    num_cities = distance_matrix.shape[0]
+    if isinstance(distance_matrix, CondensedMatrix):
+        return distance_matrix.row
+    if isinstance(distance_matrix, CoordinateInstance):
+        if num_cities > BOUND_DENSE_LIMIT:
+            return distance_matrix.row
+        matrix = np.empty((num_cities, num_cities), dtype=np.float32)
+        block = max(1, 2**22 // num_cities)
+        for start in range(0, num_cities, block):
+            matrix[start:start + block] = distance_matrix[start:start + block]
+        return lambda i: matrix[i]
+    matrix = np.asarray(distance_matrix)
+    if not is_symmetric(matrix):
+        matrix = np.minimum(matrix, matrix.T)
+    return lambda i: matrix[i]
+
+def _nearest_neighbor_length(row, num_cities: int) -> float:
+    """Length of the nearest neighbor tour from the depot (an upper bound for the subgradient steps)."""
+    visited = np.zeros(num_cities)
+    visited[0] = np.inf
+    city, length = 0, 0.0
+    for _ in range(num_cities - 1):
+        distances = row(city) + visited
+        nearest = int(distances.argmin())
+        length += float(distances[nearest])
+        visited[nearest] = np.inf
+        city = nearest
+    return length + float(row(city)[0])
+
+def one_tree(row, num_cities: int, penalties: np.ndarray) -> Tuple[float, np.ndarray]:
+    """Minimum 1-tree under the weights d(i, j) + penalties[i] + penalties[j]; returns its weight and degrees."""
+    degrees = np.zeros(num_cities, dtype=int)
+    weight = 0.0
+    if num_cities > 2:
+        # Cities already in the tree get an infinite penalty, so they are never updated again
+        outside = penalties.astype(float)
+        outside[[0, 1]] = np.inf
+        keys = row(1) + outside + penalties[1]
+        links = np.ones(num_cities, dtype=int)
+        candidate = np.empty(num_cities)
+        closer = np.empty(num_cities, dtype=bool)
+        for _ in range(num_cities - 2):
+            city = int(keys.argmin())
+            weight += keys[city]
+            degrees[city] += 1
+            degrees[links[city]] += 1
+            outside[city] = np.inf
+            keys[city] = np.inf
+            np.add(row(city), outside, out=candidate)
+            candidate += penalties[city]
+            np.less(candidate, keys, out=closer)
+            np.copyto(keys, candidate, where=closer)
+            np.copyto(links, city, where=closer)
+
+    depot = row(0) + penalties + penalties[0]
+    depot[0] = np.inf
+    cheapest = np.argpartition(depot, 1)[:2] if num_cities > 2 else np.arange(1, num_cities)
+    weight += depot[cheapest].sum()
+    np.add.at(degrees, cheapest, 1)
+    degrees[0] += len(cheapest)
+    return weight, degrees
+
+def held_karp_bound(distance_matrix=None, iterations: int = 100, patience: int = 5) -> float:
+    """Held-Karp lower bound on the optimal tour length, by subgradient ascent on the 1-tree."""
+    distance_matrix = get_distance_matrix() if distance_matrix is None else distance_matrix
+    num_cities = distance_matrix.shape[0]
+    row = _symmetric_rows(distance_matrix)
+    upper_bound = _nearest_neighbor_length(row, num_cities)
+    penalties = np.zeros(num_cities)
+    best = -np.inf
+    scale = 2.0
+    stagnant = 0
+    for _ in range(iterations):
+        weight, degrees = one_tree(row, num_cities, penalties)
+        bound = weight - 2 * penalties.sum()
+        if bound > best + 1e-9 * abs(bound):
+            best = bound
+            stagnant = 0
+        else:
+            stagnant += 1
+            if stagnant >= patience:
+                scale /= 2
+                stagnant = 0
+        subgradient = degrees - 2
+        norm = subgradient @ subgradient
+        if norm == 0: # The 1-tree is a tour, hence optimal
+            break
+        penalties += scale * max(upper_bound - bound, 1e-9 * upper_bound) / norm * subgradient
+    if np.issubdtype(distance_matrix.dtype, np.integer):
+        return int(np.ceil(best - 1e-6))
+    return float(best)
+
+def lower_bound(distance_matrix=None, cache_dir: Optional[str] = None) -> float:
+    """Returns held_karp_bound of the instance, computed once per instance (cached in bounds.json)."""
+    return _cached_instance_value('bounds.json', _BOUNDS, held_karp_bound, distance_matrix, cache_dir)
 
 # --- 3. Experiment Execution ---
 
-def run_experiments():
-    """Main function to run all experiments."""
-    
-    num_runs = 30
-    results = {}
+MASTER_SEED = 2025 # Fixed so that interrupted sweeps can be resumed from the store
 
-    # --- Experiment 1: Population Size ---
-    print("Running Experiment 1: Population Size")
-    exp1_params = [20, 50, 100]
-    results['pop_size'] = {}
-    for size in exp1_params:
-        print(f"  Testing size: {size}...")
-        key = f"pop_{size}"
-        results['pop_size'][key] = []
-        for i in range(num_runs):
-            print(f"    Run {i+1}/{num_runs}")
-            params = {
-                'pop_size': size,
-                'mutation_rate': 0.05, # Fixed
-                'tournament_size': 3,    # Fixed
-                'elite_perc': 0.05,      # Fixed
-                'generations': 200
-            }
-            start_time = time.time()
-            fitness, convergence, diversity = run_ga(params)
-            exec_time = time.time() - start_time
-            results['pop_size'][key].append({
-                'fitness': fitness,
-                'convergence': convergence,
-                'diversity': diversity,
-                'time': exec_time
-            })
+def _init_worker(distance_matrix: np.ndarray, symmetric: Optional[bool] = None):
+    """Shares the loaded instance with a worker process."""
+    set_instance(distance_matrix, symmetric)
 
-    # --- Experiment 2: Mutation Rate ---
-    print("\nRunning Experiment 2: Mutation Rate")
-    exp2_params = [0.01, 0.05, 0.10, 0.20]  # 1%, 5%, 10%, 20%
-    results['mutation_rate'] = {}
-    for rate in exp2_params:
-        print(f"  Testing rate: {rate*100:.0f}%...")
-        key = f"mut_{int(rate*100)}"
-        results['mutation_rate'][key] = []
-        for i in range(num_runs):
-            print(f"    Run {i+1}/{num_runs}")
-            params = {
-                'pop_size': 50,          # Fixed
-                'mutation_rate': rate,
-                'tournament_size': 3,    # Fixed
-                'elite_perc': 0.05,      # Fixed
-                'generations': 200
-            }
-            start_time = time.time()
-            fitness, convergence, diversity = run_ga(params)
-            exec_time = time.time() - start_time
-            results['mutation_rate'][key].append({
-                'fitness': fitness,
-                'convergence': convergence,
-                'diversity': diversity,
-                'time': exec_time
-            })
+def _execute_run(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Runs the GA once and packs the outcome into a result record."""
+    start_time = time.time()
+    fitness, convergence, diversity, stats = run_ga(params)
+    exec_time = time.time() - start_time
+    return {
+        'fitness': fitness,
+        'convergence': convergence,
+        'diversity': diversity,
+        'time': exec_time,
+        'stats': stats
+    }
 
-    # --- Experiment 3: Tournament Size ---
-    print("\nRunning Experiment 3: Tournament Size")
-    exp3_params = [2, 3, 5, 7]
-    results['tournament_size'] = {}
-    for size in exp3_params:
-        print(f"  Testing size: {size}...")
-        key = f"tour_{size}"
-        results['tournament_size'][key] = []
-        for i in range(num_runs):
-            print(f"    Run {i+1}/{num_runs}")
-            params = {
-                'pop_size': 50,          # Fixed
-                'mutation_rate': 0.05,   # Fixed
-                'tournament_size': size,
-                'elite_perc': 0.05,      # Fixed
-                'generations': 200
-            }
-            start_time = time.time()
-            fitness, convergence, diversity = run_ga(params)
-            exec_time = time.time() - start_time
-            results['tournament_size'][key].append({
-                'fitness': fitness,
-                'convergence': convergence,
-                'diversity': diversity,
-                'time': exec_time
-            })
+def _to_json(value):
+    """json.dump fallback for numpy scalars and arrays."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+FINGERPRINT_BLOCK_BYTES = 1 << 23 # Widened rows hashed at a time by instance_fingerprint
+
+def instance_fingerprint(distance_matrix=None) -> str:
+    """SHA-256 identifying the TSP instance, independent of its storage dtype."""
+    distance_matrix = get_distance_matrix() if distance_matrix is None else distance_matrix
+    digest = hashlib.sha256()
+    if isinstance(distance_matrix, CoordinateInstance):
+        digest.update(distance_matrix.metric.encode())
+        data = distance_matrix.coords
+    else:
+        data = distance_matrix if hasattr(distance_matrix, 'dtype') else np.asarray(distance_matrix)
+    dtype = np.result_type(data.dtype, np.int64)
+    digest.update(str((dtype.str, tuple(data.shape))).encode())
+    # Rows are widened and hashed a block at a time, so a compact or memory-mapped
+    # instance is never materialized at int64 size; the bytes hashed are the same
+    row_size = max(1, int(np.prod(data.shape[1:])) * dtype.itemsize)
+    block = max(1, FINGERPRINT_BLOCK_BYTES // row_size)
+    for start in range(0, data.shape[0], block):
+        digest.update(np.asarray(data[start:start + block]).astype(dtype, copy=False).tobytes())
+    return digest.hexdigest()
+
+def run_key(params: Dict[str, Any], instance: str) -> str:
+    """Content address of a run: hash of its parameters, seed and instance fingerprint."""
+    seed = params.get('seed')
+    if isinstance(seed, np.random.SeedSequence):
+        seed = {'entropy': seed.entropy, 'spawn_key': list(seed.spawn_key)}
+    payload = {
+        'params': {name: value for name, value in params.items() if name != 'seed'},
+        'seed': seed,
+        'instance': instance
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=_to_json).encode()).hexdigest()
+
+class ResultStore:
+    """Append-only JSON-lines store of completed runs, keyed by run_key."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._offsets = {} # Only key -> byte offset of its line; records are read back on demand
+        if os.path.exists(path):
+            with open(path, 'rb+') as f:
+                complete = 0 # Bytes up to the last newline
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        self._offsets[json.loads(line)['key']] = complete
+                    except ValueError:
+                        pass
+                    complete += len(line)
+                f.truncate(complete)
 
-    # --- Experiment 4: Elitism ---
-    print("\nRunning Experiment 4: Elitism")
-    exp4_params = [0.0, 0.01, 0.05, 0.10]  # 0%, 1%, 5%, 10%
-    results['elitism'] = {}
-    for perc in exp4_params:
-        print(f"  Testing percentage: {perc*100:.0f}%...")
-        key = f"elit_{int(perc*100)}"
-        results['elitism'][key] = []
-        for i in range(num_runs):
-            print(f"    Run {i+1}/{num_runs}")
-            params = {
-                'pop_size': 50,          # Fixed
-                'mutation_rate': 0.05,   # Fixed
-                'tournament_size': 3,    # Fixed
-                'elite_perc': perc,
-                'generations': 200
+    def __contains__(self, key: str) -> bool:
+        return key in self._offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        offset = self._offsets.get(key)
+        if offset is None:
+            return None
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.readline())['record']
+
+    def append(self, key: str, record: Dict[str, Any]) -> None:
+        """Persists one completed run."""
+        line = json.dumps({'key': key, 'record': record}, default=_to_json)
+        with open(self.path, 'ab') as f:
+            offset = f.tell()
+            f.write(line.encode() + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._offsets[key] = offset
+
+def execute_runs(tasks: List[Tuple[str, str, Dict[str, Any]]], results: Dict[str, Any],
+                 workers: Optional[int] = None, master_seed: Optional[int] = None,
+                 store: Optional[ResultStore] = None) -> None:
+    """Executes (experiment, key, params) tasks and appends the records to results."""
+    master = np.random.SeedSequence(master_seed)
+    print(f"Master seed: {master.entropy}")
+    run_params = [dict(params, seed=seed) for (_, _, params), seed in zip(tasks, master.spawn(len(tasks)))]
+
+    run_keys = [None] * len(tasks)
+    if store is not None:
+        instance = instance_fingerprint()
+        run_keys = [run_key(params, instance) for params in run_params]
+    pending = [index for index, run_id in enumerate(run_keys) if store is None or run_id not in store]
+    if store is not None:
+        print(f"{len(tasks) - len(pending)} of {len(tasks)} runs found in {store.path}")
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(pending) <= 1:
+        completed = ((index, _execute_run(run_params[index])) for index in pending)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(get_distance_matrix(), instance_is_symmetric()))
+        futures = {pool.submit(_execute_run, run_params[index]): index for index in pending}
+        completed = ((futures.pop(future), future.result()) for future in as_completed(futures))
+
+    # Runs are stored as soon as they finish, but enter results in task order:
+    # a run that finishes early waits in `arrived` until the runs before it are in
+    waiting, arrived = set(pending), {}
+    done = 0
+    def release():
+        nonlocal done
+        while done < len(tasks) and (done in arrived or done not in waiting):
+            experiment, key, _ = tasks[done]
+            record = arrived.pop(done) if done in arrived else store.get(run_keys[done])
+            results[experiment][key].append(record)
+            done += 1
+            print(f"    Run {done}/{len(tasks)} ({experiment}: {key})")
+
+    try:
+        release()
+        for index, record in completed:
+            if store is not None:
+                store.append(run_keys[index], record)
+            arrived[index] = record
+            release()
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+# --- Streaming aggregation of run results ---
+
+class TraceAggregator:
+    """Online per-generation statistics of convergence or diversity traces."""
+
+    def __init__(self, length: int, sketch_size: int = 100, seed: int = 0):
+        self.length = length
+        self.count = 0
+        self._mean = np.zeros(length)
+        self._m2 = np.zeros(length)
+        self.min = np.full(length, np.inf)
+        self.max = np.full(length, -np.inf)
+        self._reservoir = np.empty((sketch_size, length))
+        self._rng = np.random.default_rng(seed)
+
+    def pad(self, trace) -> np.ndarray:
+        """Returns the trace as a float array of exactly `length` values."""
+        values = np.asarray(trace, dtype=float)[:self.length]
+        if len(values) == 0:
+            return np.full(self.length, np.nan)
+        return np.concatenate([values, np.full(self.length - len(values), values[-1])])
+
+    def add(self, trace) -> None:
+        """Folds one trace into the statistics."""
+        values = self.pad(trace)
+        self.count += 1
+        delta = values - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (values - self._mean)
+        np.minimum(self.min, values, out=self.min)
+        np.maximum(self.max, values, out=self.max)
+
+        sketch_size = len(self._reservoir)
+        if self.count <= sketch_size:
+            self._reservoir[self.count - 1] = values
+        else:
+            slot = self._rng.integers(0, self.count)
+            if slot < sketch_size:
+                self._reservoir[slot] = values
+
+    @property
+    def mean(self) -> np.ndarray:
+        return self._mean.copy()
+
+    @property
+    def variance(self) -> np.ndarray:
+        """Population variance (same convention as np.var / np.std)."""
+        return self._m2 / self.count if self.count else np.full(self.length, np.nan)
+
+    @property
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.variance)
+
+    def quantile(self, q) -> np.ndarray:
+        """Per-generation quantile(s) estimated from the reservoir sketch."""
+        filled = min(self.count, len(self._reservoir))
+        return np.quantile(self._reservoir[:filled], q, axis=0)
+
+class TraceSpill:
+    """Append-only columnar file of fixed-length traces (one row per run)."""
+
+    def __init__(self, path: str, length: int, dtype=np.float64):
+        self.path = path
+        self.length = length
+        self.dtype = np.dtype(dtype)
+
+    def clear(self) -> None:
+        """Starts an empty file; arrays mapped from the old one stay valid."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        open(self.path, 'wb').close()
+
+    def append(self, values: np.ndarray) -> None:
+        with open(self.path, 'ab') as f:
+            np.asarray(values, dtype=self.dtype).tofile(f)
+
+    def read(self) -> np.ndarray:
+        """Memory-maps the traces written so far."""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return np.empty((0, self.length), dtype=self.dtype)
+        return np.memmap(self.path, dtype=self.dtype, mode='r').reshape(-1, self.length)
+
+class ConfigResults:
+    """Results of all runs of one configuration, aggregated as they arrive."""
+
+    def __init__(self, generations: int, name: str = 'config', spill_dir: Optional[str] = None):
+        self.fitnesses = []
+        self.times = []
+        self.stop_reasons = []
+        self.convergence = TraceAggregator(generations)
+        self.diversity = TraceAggregator(generations)
+        self.spills = {}
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+            self.spills = {
+                'convergence': TraceSpill(os.path.join(spill_dir, f"{name}.convergence.f64"), generations),
+                'diversity': TraceSpill(os.path.join(spill_dir, f"{name}.diversity.i32"), generations, np.int32)
             }
-            start_time = time.time()
-            fitness, convergence, diversity = run_ga(params)
-            exec_time = time.time() - start_time
-            results['elitism'][key].append({
-                'fitness': fitness,
-                'convergence': convergence,
-                'diversity': diversity,
-                'time': exec_time
+            for spill in self.spills.values():
+                spill.clear()
+
+    def __len__(self) -> int:
+        return len(self.fitnesses)
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Adds one run record (the raw traces are not kept)."""
+        self.fitnesses.append(float(record['fitness']))
+        self.times.append(record['time'])
+        self.stop_reasons.append(record.get('stats', {}).get('stop_reason', 'generations'))
+        for name, aggregator in (('convergence', self.convergence), ('diversity', self.diversity)):
+            aggregator.add(record[name])
+            if name in self.spills:
+                self.spills[name].append(aggregator.pad(record[name]))
+
+# --- Declarative parameter sweeps ---
+
+# run_ga parameters. Required: pop_size, mutation_rate, tournament_size, elite_perc.
+#   generations       generation budget (default 100)
+#   seed              numpy Generator seed; None draws fresh entropy
+#   mode              'generational' (default) or 'steady_state', which breeds
+#                     offspring_per_step (default 2) children per step
+#   islands           > 1 runs an island model with migration_interval (10),
+#                     migrants (1), topology ('ring' or 'full') and island_workers (1)
+#   seed_fraction     share of the initial population built by seed_methods
+#   local_search      'offspring' or 'elites': 2-opt on the ls_neighbors (10)
+#                     nearest cities, alternated with Or-opt when ls_or_opt
+#   cache_size        FitnessCache entries; deduplicate replaces duplicate offspring
+#   edge_diversity    also records edge entropy and mean pairwise edge distance
+#   patience, min_improvement, target_fitness, time_limit, max_evaluations,
+#   lower_bound, bound_gap
+#                     early stopping (see StoppingCriteria)
+#   profile_phases, trace_memory, profile_path ('{run}' becomes the run key)
+#                     instrumentation
+# run_ga returns (best_fitness, convergence, diversity, stats); stats has
+# stop_reason, generations and evaluations, plus the cache counters, edge traces,
+# phase_times/phase_totals, peak_memory and gap_to_bound when enabled.
+BASE_PARAMS = {
+    'pop_size': 50,
+    'mutation_rate': 0.05,
+    'tournament_size': 3,
+    'elite_perc': 0.05,
+    'generations': 200
+}
+
+# One spec per experiment. 'factors' maps run_ga parameters to their levels
+# (a list) or, for the 'random' and 'lhs' designs, to a range
+# {'low': ..., 'high': ..., 'type': 'int' | 'float' | 'log'}. 'label' turns the
+# params of a configuration into its key; 'unit' is appended when printing.
+EXPERIMENTS = [
+    {'name': 'pop_size', 'title': 'Population Size', 'design': 'ofat',
+     'factors': {'pop_size': [20, 50, 100]},
+     'label': lambda p: f"pop_{p['pop_size']}"},
+    {'name': 'mutation_rate', 'title': 'Mutation Rate', 'design': 'ofat',
+     'factors': {'mutation_rate': [0.01, 0.05, 0.10, 0.20]}, # 1%, 5%, 10%, 20%
+     'label': lambda p: f"mut_{int(p['mutation_rate']*100)}", 'unit': '%'},
+    {'name': 'tournament_size', 'title': 'Tournament Size', 'design': 'ofat',
+     'factors': {'tournament_size': [2, 3, 5, 7]},
+     'label': lambda p: f"tour_{p['tournament_size']}", 'plot_diversity': True},
+    {'name': 'elitism', 'title': 'Elitism', 'design': 'ofat',
+     'factors': {'elite_perc': [0.0, 0.01, 0.05, 0.10]}, # 0%, 1%, 5%, 10%
+     'label': lambda p: f"elit_{int(p['elite_perc']*100)}", 'unit': '%'},
+]
+
+# Opt-in, so the default sweep stays as it was:
+# run_experiments(specs=EXPERIMENTS + [SEEDING_EXPERIMENT])
+SEEDING_EXPERIMENT = {
+    'name': 'seeding', 'title': 'Seeded Initial Population', 'design': 'ofat',
+    'factors': {'seed_fraction': [0.0, 0.1, 0.5]}, # 0%, 10%, 50% built by heuristics
+    'label': lambda p: f"seed_{int(p['seed_fraction']*100)}", 'unit': '%'
+}
+
+SWEEP_DESIGNS = ('grid', 'ofat', 'random', 'lhs')
+
+def _default_label(params: Dict[str, Any], factors: Dict[str, Any]) -> str:
+    return "_".join(f"{name}={params[name]:g}" if isinstance(params[name], float) else f"{name}={params[name]}"
+                    for name in factors)
+
+def _scale_unit(values: np.ndarray, factor: Any) -> List[Any]:
+    """Maps values in [0, 1) onto a factor given as a list of levels or a range."""
+    if isinstance(factor, dict):
+        low, high, kind = factor['low'], factor['high'], factor.get('type', 'float')
+        if kind == 'log':
+            return list(np.exp(np.log(low) + values * (np.log(high) - np.log(low))))
+        if kind == 'int':
+            return [int(v) for v in np.floor(low + values * (high - low + 1))]
+        return list(low + values * (high - low))
+    levels = list(factor)
+    return [levels[int(v)] for v in np.floor(values * len(levels))]
+
+def expand_sweep(spec: Dict[str, Any], base: Optional[Dict[str, Any]] = None,
+                 rng: Optional[np.random.Generator] = None) -> List[Tuple[str, Dict[str, Any]]]:
+    """Expands a sweep spec into its (label, params) configurations."""
+    base = dict(BASE_PARAMS if base is None else base, **spec.get('base', {}))
+    factors = spec['factors']
+    design = spec.get('design', 'grid')
+    label = spec.get('label') or (lambda params: _default_label(params, factors))
+    rng = rng or np.random.default_rng(spec.get('seed', 0))
+
+    if design == 'grid':
+        combinations = [dict(zip(factors, values)) for values in itertools.product(*factors.values())]
+    elif design == 'ofat':
+        combinations = [{name: level} for name, levels in factors.items() for level in levels]
+    elif design in ('random', 'lhs'):
+        samples = spec['samples']
+        columns = {}
+        for name, factor in factors.items():
+            if design == 'lhs':
+                unit = (rng.permutation(samples) + rng.random(samples)) / samples
+            else:
+                unit = rng.random(samples)
+            columns[name] = _scale_unit(unit, factor)
+        combinations = [{name: columns[name][i] for name in factors} for i in range(samples)]
+    else:
+        raise ValueError(f"Unknown design '{design}', expected one of {SWEEP_DESIGNS}")
+
+    configurations = {}
+    for combination in combinations:
+        params = dict(base, **combination)
+        configurations.setdefault(label(params), params)
+    return list(configurations.items())
+
+def run_sweeps(specs: List[Dict[str, Any]], num_runs: int = 30, base: Optional[Dict[str, Any]] = None,
+               workers: Optional[int] = None, master_seed: Optional[int] = MASTER_SEED,
+               store: Optional[ResultStore] = None, spill_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Expands every spec, schedules num_runs runs per configuration and collects them."""
+    results = {}
+    tasks = []
+    for number, spec in enumerate(specs, start=1):
+        print(f"Collecting Experiment {number}: {spec.get('title', spec['name'])}")
+        results[spec['name']] = {}
+        for label, params in expand_sweep(spec, base):
+            print(f"  Testing {label}...")
+            results[spec['name']][label] = ConfigResults(params.get('generations', 100),
+                                                         f"{spec['name']}.{label}", spill_dir)
+            tasks.extend((spec['name'], label, params) for _ in range(num_runs))
+
+    print(f"\nExecuting {len(tasks)} runs")
+    execute_runs(tasks, results, workers, master_seed, store)
+    return results
+
+# --- Hyperparameter tuning: successive halving over generations ---
+
+# Two-sided 95% Student t quantiles for small samples (df -> t); larger df use 1.96
+T_QUANTILES_95 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306,
+                  9: 2.262, 10: 2.228, 12: 2.179, 15: 2.131, 20: 2.086, 25: 2.060, 30: 2.042}
+
+def t_quantile_95(df: int) -> float:
+    """Conservative two-sided 95% t quantile (the closest tabulated df below)."""
+    if df <= 0:
+        return float('inf')
+    if df > 30:
+        return 1.96
+    return T_QUANTILES_95[max(d for d in T_QUANTILES_95 if d <= df)]
+
+def successive_halving(configurations: List[Tuple[str, Dict[str, Any]]], runs: int = 5,
+                       min_generations: int = 25, max_generations: int = 200, eta: int = 2,
+                       workers: Optional[int] = None, master_seed: Optional[int] = MASTER_SEED,
+                       store: Optional[ResultStore] = None, bootstrap: int = 1000) -> List[Dict[str, Any]]:
+    """Tunes run_ga hyperparameters by successive halving over the generation budget."""
+    budgets = []
+    generations = min_generations
+    while generations < max_generations:
+        budgets.append(generations)
+        generations *= eta
+    budgets.append(max_generations)
+    rung_seeds = np.random.SeedSequence(master_seed).generate_state(len(budgets))
+
+    survivors = list(configurations)
+    ranking = []
+    for rung, (budget, rung_seed) in enumerate(zip(budgets, rung_seeds)):
+        print(f"Rung {rung + 1}/{len(budgets)}: {len(survivors)} configurations x {runs} runs, "
+              f"{budget} generations")
+        results = {'race': {label: [] for label, _ in survivors}}
+        tasks = [('race', label, dict(params, generations=budget)) for label, params in survivors
+                 for _ in range(runs)]
+        execute_runs(tasks, results, workers, int(rung_seed), store)
+
+        scores = []
+        for label, params in survivors:
+            fitnesses = np.array([float(r['fitness']) for r in results['race'][label]])
+            std = fitnesses.std(ddof=1) if len(fitnesses) > 1 else 0.0
+            scores.append({
+                'label': label,
+                'params': params,
+                'generations': budget,
+                'runs': len(fitnesses),
+                'mean': fitnesses.mean(),
+                'std': std,
+                'ci95': t_quantile_95(len(fitnesses) - 1) * std / np.sqrt(len(fitnesses)),
+                'fitnesses': fitnesses
             })
+        scores.sort(key=lambda score: score['mean'])
+
+        last_rung = rung == len(budgets) - 1
+        keep = len(scores) if last_rung else max(1, int(np.ceil(len(scores) / eta)))
+        if last_rung or keep == 1:
+            break
+        ranking = scores[keep:] + ranking # Eliminated now rank above those eliminated earlier
+        survivors = [(score['label'], score['params']) for score in scores[:keep]]
+
+    # Probability of being the best among the last rung, resampling runs with replacement
+    rng = np.random.default_rng(0)
+    samples = np.array([[rng.choice(score['fitnesses'], size=len(score['fitnesses'])).mean()
+                         for score in scores] for _ in range(bootstrap)])
+    wins = np.bincount(samples.argmin(axis=1), minlength=len(scores))
+    for score, win in zip(scores, wins):
+        score['p_best'] = win / bootstrap
+
+    ranking = scores + ranking
+    for position, score in enumerate(ranking, start=1):
+        del score['fitnesses']
+        p_best = f", P(best)={score['p_best']:.2f}" if 'p_best' in score else ""
+        print(f"  {position}. {score['label']}: {score['mean']:.2f} +/- {score['ci95']:.2f} "
+              f"({score['runs']} runs, {score['generations']} generations{p_best})")
+    return ranking
+
+def run_experiments(workers: Optional[int] = None, master_seed: Optional[int] = MASTER_SEED,
+                    store_path: Optional[str] = 'experiment_runs.jsonl',
+                    spill_dir: Optional[str] = 'experiment_traces',
+                    specs: Optional[List[Dict[str, Any]]] = None, num_runs: int = 30):
+    """Main function to run all experiments."""
+    specs = EXPERIMENTS if specs is None else specs
+    if get_num_cities() <= HELD_KARP_LIMIT:
+        reference = ('optimum', optimal_tour_length())
+    else:
+        reference = ('lower bound', lower_bound())
+    print(f"Reference {reference[0]}: {reference[1]}")
+    store = ResultStore(store_path) if store_path else None
+    results = run_sweeps(specs, num_runs, workers=workers, master_seed=master_seed,
+                         store=store, spill_dir=spill_dir)
 
     # --- 4. Analysis and Visualization ---
     print("\n--- Analysis ---")
     
     # Calculate mean/std dev for final fitness and time for each experiment
-    analyze_results(results)
+    analyze_results(results, specs, reference)
     
     # Generate plots
-    generate_plots(results)
+    generate_plots(results, specs)
     
     # Save results to file
-    save_results_to_file(results)
+    save_results_to_file(results, specs, reference)
     
     # Example of accessing results for one configuration
-    pop_20_results = results['pop_size']['pop_20']
-    avg_fitness_pop_20 = np.mean([r['fitness'] for r in pop_20_results])
-    print(f"\nExample: Avg fitness for Pop Size 20: {avg_fitness_pop_20:.2f}")
+    if 'pop_20' in results.get('pop_size', {}):
+        pop_20_results = results['pop_size']['pop_20']
+        avg_fitness_pop_20 = np.mean(pop_20_results.fitnesses)
+        print(f"\nExample: Avg fitness for Pop Size 20: {avg_fitness_pop_20:.2f}")
+
+def summary_lines(results, specs: Optional[List[Dict[str, Any]]] = None,
+                  reference: Optional[Tuple[str, float]] = None) -> List[Tuple[str, List[str]]]:
+    """Builds the per-experiment summary used by analyze_results and save_results_to_file."""
+    specs = EXPERIMENTS if specs is None else specs
+    sections = []
+    for number, spec in enumerate(specs, start=1):
+        lines = []
+        for key, data in results[spec['name']].items():
+            fitnesses = data.fitnesses
+            times = data.times
+            line = (f"{key}{spec.get('unit', '')}: Fitness Mean={np.mean(fitnesses):.2f}, "
+                    f"Std={np.std(fitnesses):.2f}, Time Mean={np.mean(times):.4f}s")
+            if reference is not None:
+                name, length = reference
+                line += f", Gap to {name}={100 * (np.mean(fitnesses) - length) / length:.2f}%"
+            lines.append(line)
+        sections.append((f"Experiment {number}: {spec.get('title', spec['name'])}", lines))
+    return sections
 
-def analyze_results(results):
+def analyze_results(results, specs: Optional[List[Dict[str, Any]]] = None,
+                    reference: Optional[Tuple[str, float]] = None):
     """Analyze and print summary statistics for all experiments."""
-    # Experiment 1: Population Size
-    print("\nExperiment 1: Population Size")
-    for key, data in results['pop_size'].items():
-        fitnesses = [r['fitness'] for r in data]
-        times = [r['time'] for r in data]
-        print(f"  {key}: Fitness Mean={np.mean(fitnesses):.2f}, Std={np.std(fitnesses):.2f}, Time Mean={np.mean(times):.4f}s")
-    
-    # Experiment 2: Mutation Rate
-    print("\nExperiment 2: Mutation Rate")
-    for key, data in results['mutation_rate'].items():
-        fitnesses = [r['fitness'] for r in data]
-        times = [r['time'] for r in data]
-        print(f"  {key}%: Fitness Mean={np.mean(fitnesses):.2f}, Std={np.std(fitnesses):.2f}, Time Mean={np.mean(times):.4f}s")
-    
-    # Experiment 3: Tournament Size
-    print("\nExperiment 3: Tournament Size")
-    for key, data in results['tournament_size'].items():
-        fitnesses = [r['fitness'] for r in data]
-        times = [r['time'] for r in data]
-        print(f"  {key}: Fitness Mean={np.mean(fitnesses):.2f}, Std={np.std(fitnesses):.2f}, Time Mean={np.mean(times):.4f}s")
-    
-    # Experiment 4: Elitism
-    print("\nExperiment 4: Elitism")
-    for key, data in results['elitism'].items():
-        fitnesses = [r['fitness'] for r in data]
-        times = [r['time'] for r in data]
-        print(f"  {key}%: Fitness Mean={np.mean(fitnesses):.2f}, Std={np.std(fitnesses):.2f}, Time Mean={np.mean(times):.4f}s")
-
-def generate_plots(results):
+    for title, lines in summary_lines(results, specs, reference):
+        print(f"\n{title}")
+        for line in lines:
+            print(f"  {line}")
+
+def generate_plots(results, specs: Optional[List[Dict[str, Any]]] = None):
     """Generate convergence plots and boxplots for all experiments."""
+    specs = EXPERIMENTS if specs is None else specs
     try:
         import matplotlib.pyplot as plt
         
-        # Create figures
-        fig, axes = plt.subplots(2, 4, figsize=(20, 10))
-        
-        # Experiment 1: Population Size - Convergence
-        ax = axes[0, 0]
-        for key, data in results['pop_size'].items():
-            # Average convergence across runs
-            avg_convergence = np.mean([r['convergence'] for r in data], axis=0)
-            ax.plot(avg_convergence, label=key)
-        ax.set_title('Experiment 1: Population Size - Convergence')
-        ax.set_xlabel('Generation')
-        ax.set_ylabel('Best Fitness')
-        ax.legend()
-        
-        # Experiment 1: Population Size - Boxplot
-        ax = axes[1, 0]
-        fitness_data = []
-        labels = []
-        for key, data in results['pop_size'].items():
-            fitness_data.append([r['fitness'] for r in data])
-            labels.append(key)
-        ax.boxplot(fitness_data, labels=labels)
-        ax.set_title('Experiment 1: Population Size - Fitness Boxplot')
-        ax.set_ylabel('Fitness')
-        
-        # Experiment 2: Mutation Rate - Convergence
-        ax = axes[0, 1]
-        for key, data in results['mutation_rate'].items():
-            # Average convergence across runs
-            avg_convergence = np.mean([r['convergence'] for r in data], axis=0)
-            ax.plot(avg_convergence, label=key)
-        ax.set_title('Experiment 2: Mutation Rate - Convergence')
-        ax.set_xlabel('Generation')
-        ax.set_ylabel('Best Fitness')
-        ax.legend()
-        
-        # Experiment 2: Mutation Rate - Boxplot
-        ax = axes[1, 1]
-        fitness_data = []
-        labels = []
-        for key, data in results['mutation_rate'].items():
-            fitness_data.append([r['fitness'] for r in data])
-            labels.append(key)
-        ax.boxplot(fitness_data, labels=labels)
-        ax.set_title('Experiment 2: Mutation Rate - Fitness Boxplot')
-        ax.set_ylabel('Fitness')
-        
-        # Experiment 3: Tournament Size - Convergence
-        ax = axes[0, 2]
-        for key, data in results['tournament_size'].items():
-            # Average convergence across runs
-            avg_convergence = np.mean([r['convergence'] for r in data], axis=0)
-            ax.plot(avg_convergence, label=key)
-        ax.set_title('Experiment 3: Tournament Size - Convergence')
-        ax.set_xlabel('Generation')
-        ax.set_ylabel('Best Fitness')
-        ax.legend()
+        # Create figures: one column per experiment
+        fig, axes = plt.subplots(2, len(specs), figsize=(5 * len(specs), 10), squeeze=False)
         
-        # Experiment 3: Tournament Size - Boxplot
-        ax = axes[1, 2]
-        fitness_data = []
-        labels = []
-        for key, data in results['tournament_size'].items():
-            fitness_data.append([r['fitness'] for r in data])
-            labels.append(key)
-        ax.boxplot(fitness_data, labels=labels)
-        ax.set_title('Experiment 3: Tournament Size - Fitness Boxplot')
-        ax.set_ylabel('Fitness')
-        
-        # Experiment 4: Elitism - Convergence
-        ax = axes[0, 3]
-        for key, data in results['elitism'].items():
-            # Average convergence across runs
-            avg_convergence = np.mean([r['convergence'] for r in data], axis=0)
-            ax.plot(avg_convergence, label=key)
-        ax.set_title('Experiment 4: Elitism - Convergence')
-        ax.set_xlabel('Generation')
-        ax.set_ylabel('Best Fitness')
-        ax.legend()
-        
-        # Experiment 4: Elitism - Boxplot
-        ax = axes[1, 3]
-        fitness_data = []
-        labels = []
-        for key, data in results['elitism'].items():
-            fitness_data.append([r['fitness'] for r in data])
-            labels.append(key)
-        ax.boxplot(fitness_data, labels=labels)
-        ax.set_title('Experiment 4: Elitism - Fitness Boxplot')
-        ax.set_ylabel('Fitness')
+        for column, spec in enumerate(specs):
+            title = f"Experiment {column + 1}: {spec.get('title', spec['name'])}"
+            data_by_key = results[spec['name']]
+
+            # Convergence
+            ax = axes[0, column]
+            for key, data in data_by_key.items():
+                # Average convergence across runs
+                avg_convergence = data.convergence.mean
+                ax.plot(avg_convergence, label=key)
+            ax.set_title(f'{title} - Convergence')
+            ax.set_xlabel('Generation')
+            ax.set_ylabel('Best Fitness')
+            ax.legend()
+
+            # Boxplot
+            ax = axes[1, column]
+            fitness_data = [data.fitnesses for data in data_by_key.values()]
+            labels = list(data_by_key)
+            ax.boxplot(fitness_data, labels=labels)
+            ax.set_title(f'{title} - Fitness Boxplot')
+            ax.set_ylabel('Fitness')
         
         plt.tight_layout()
         plt.savefig('experiment_results.png')
         plt.show()
         
-        # Additional plot for diversity in Experiment 3
-        plt.figure(figsize=(10, 6))
-        for key, data in results['tournament_size'].items():
-            # Average diversity across runs
-            avg_diversity = np.mean([r['diversity'] for r in data], axis=0)
-            plt.plot(avg_diversity, label=key)
-        plt.title('Experiment 3: Tournament Size - Diversity')
-        plt.xlabel('Generation')
-        plt.ylabel('Unique Individuals')
-        plt.legend()
-        plt.savefig('diversity_plot.png')
-        plt.show()
+        # Additional diversity plots (Experiment 3 by default)
+        for number, spec in enumerate(specs, start=1):
+            if not spec.get('plot_diversity'):
+                continue
+            plt.figure(figsize=(10, 6))
+            for key, data in results[spec['name']].items():
+                # Average diversity across runs
+                avg_diversity = data.diversity.mean
+                plt.plot(avg_diversity, label=key)
+            plt.title(f"Experiment {number}: {spec.get('title', spec['name'])} - Diversity")
+            plt.xlabel('Generation')
+            plt.ylabel('Unique Individuals')
+            plt.legend()
+            plt.savefig('diversity_plot.png')
+            plt.show()
         
         print("\nPlots saved as 'experiment_results.png' and 'diversity_plot.png'")
         
     except ImportError:
         print("\nMatplotlib not available. Skipping plot generation.")
 
-def save_results_to_file(results):
+def save_results_to_file(results, specs: Optional[List[Dict[str, Any]]] = None,
+                         reference: Optional[Tuple[str, float]] = None):
     """Save results to a text file for further analysis."""
     with open('experiment_results.txt', 'w') as f:
         f.write("TSP Genetic Algorithm - Parameter Analysis Results\n")
         f.write("=" * 50 + "\n\n")
         
-        # Experiment 1: Population Size
-        f.write("Experiment 1: Population Size\n")
-        f.write("-" * 30 + "\n")
-        for key, data in results['pop_size'].items():
-            fitnesses = [r['fitness'] for r in data]
-            times = [r['time'] for r in data]
-            f.write(f"{key}: Fitness Mean={np.mean(fitnesses):.2f}, Std={np.std(fitnesses):.2f}, Time Mean={np.mean(times):.4f}s\n")
-        f.write("\n")
-        
-        # Experiment 2: Mutation Rate
-        f.write("Experiment 2: Mutation Rate\n")
-        f.write("-" * 30 + "\n")
-        for key, data in results['mutation_rate'].items():
-            fitnesses = [r['fitness'] for r in data]
-            times = [r['time'] for r in data]
-            f.write(f"{key}%: Fitness Mean={np.mean(fitnesses):.2f}, Std={np.std(fitnesses):.2f}, Time Mean={np.mean(times):.4f}s\n")
-        f.write("\n")
-        
-        # Experiment 3: Tournament Size
-        f.write("Experiment 3: Tournament Size\n")
-        f.write("-" * 30 + "\n")
-        for key, data in results['tournament_size'].items():
-            fitnesses = [r['fitness'] for r in data]
-            times = [r['time'] for r in data]
-            f.write(f"{key}: Fitness Mean={np.mean(fitnesses):.2f}, Std={np.std(fitnesses):.2f}, Time Mean={np.mean(times):.4f}s\n")
-        f.write("\n")
-        
-        # Experiment 4: Elitism
-        f.write("Experiment 4: Elitism\n")
-        f.write("-" * 30 + "\n")
-        for key, data in results['elitism'].items():
-            fitnesses = [r['fitness'] for r in data]
-            times = [r['time'] for r in data]
-            f.write(f"{key}%: Fitness Mean={np.mean(fitnesses):.2f}, Std={np.std(fitnesses):.2f}, Time Mean={np.mean(times):.4f}s\n")
-        f.write("\n")
+        if reference is not None:
+            f.write(f"Reference {reference[0]}: {reference[1]}\n\n")
+        for title, lines in summary_lines(results, specs, reference):
+            f.write(f"{title}\n")
+            f.write("-" * 30 + "\n")
+            for line in lines:
+                f.write(f"{line}\n")
+            f.write("\n")
 
 if __name__ == "__main__":
-    run_experiments()
\ No newline at end of file
+    run_experiments()
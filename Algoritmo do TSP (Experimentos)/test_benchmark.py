@@ -0,0 +1,48 @@
+'''
+Unit tests for the operator microbenchmarks.
+'''
+
+import os
+import tempfile
+import unittest
+import numpy as np
+import benchmark
+import codigo
+
+class TestBenchmark(unittest.TestCase):
+
+    def setUp(self):
+        """Keep a small active instance, which the benchmarks must restore."""
+        self.test_matrix = np.array([
+            [0, 10, 20],
+            [10, 0, 30],
+            [20, 30, 0]
+        ])
+        codigo.set_instance(self.test_matrix)
+
+    def test_run_benchmarks_and_baseline(self):
+        """Test that every benchmark runs on a synthetic instance and round-trips as a baseline."""
+        results = benchmark.run_benchmarks(sizes=[8], pop_sizes=[10], repeat=1, min_time=0.0)
+        self.assertIn('calculate_fitness/n=8', results)
+        self.assertIn('next_generation/n=8/pop=10', results)
+        self.assertTrue(all(seconds > 0 for seconds in results.values()))
+        self.assertIs(codigo.DISTANCE_MATRIX, self.test_matrix)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'baseline.json')
+            benchmark.save_baseline(results, path)
+            self.assertEqual(benchmark.load_baseline(path), results)
+
+        with self.assertRaises(ValueError):
+            benchmark.run_benchmarks(sizes=[8], operators=['no_such_operator'])
+
+    def test_compare_results(self):
+        """Test that only changes beyond the threshold are reported."""
+        baseline = {'a': 1.0, 'b': 1.0, 'c': 1.0, 'd': 1.0}
+        current = {'a': 1.5, 'b': 1.05, 'c': 0.5, 'new': 2.0}
+        regressions, improvements = benchmark.compare_results(current, baseline, threshold=0.1)
+        self.assertEqual(regressions, [('a', 1.5)])
+        self.assertEqual(improvements, [('c', 0.5)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,10 @@
 Unit tests for the TSP Genetic Algorithm components.
 '''
 
+import itertools
+import json
+import os
+import tempfile
 import unittest
 import numpy as np
 import codigo # Import the script we want to test
@@ -20,6 +24,18 @@ class TestGeneticAlgorithmComponents(unittest.TestCase):
         codigo.DISTANCE_MATRIX = self.test_matrix
         codigo.NUM_CITIES = 3
 
+    def use_random_instance(self, num_cities):
+        """Activates a random asymmetric instance with distances in [1, 100)."""
+        codigo.DISTANCE_MATRIX = np.random.default_rng(0).integers(1, 100, size=(num_cities, num_cities))
+        codigo.NUM_CITIES = num_cities
+
+    def small_params(self, **overrides):
+        """Parameters of a short run (5 generations of 10 individuals)."""
+        params = {'pop_size': 10, 'mutation_rate': 0.1, 'tournament_size': 3,
+                  'elite_perc': 0.1, 'generations': 5}
+        params.update(overrides)
+        return params
+
     def test_calculate_fitness(self):
         """Test that fitness (distance) is calculated correctly."""
         # For a 3-city problem, the individual is a permutation of [1, 2]
@@ -36,6 +52,14 @@ class TestGeneticAlgorithmComponents(unittest.TestCase):
         # 20 + 30 + 10 = 60
         self.assertEqual(codigo.calculate_fitness(individual_2), expected_distance_2)
 
+    def test_evaluate_population(self):
+        """Test that the batched evaluation matches calculate_fitness."""
+        population = [[1, 2], [2, 1]]
+        fitnesses = codigo.evaluate_population(population)
+        self.assertEqual(fitnesses.shape, (2,))
+        for individual, fitness in zip(population, fitnesses):
+            self.assertEqual(fitness, codigo.calculate_fitness(individual))
+
     def test_ordered_crossover(self):
         """Test the Ordered Crossover (OX) implementation."""
         # For a 5-city problem, individuals have length 4
@@ -66,6 +90,21 @@ class TestGeneticAlgorithmComponents(unittest.TestCase):
         # Check if the child is a valid permutation
         self.assertEqual(sorted(child1), [1, 2, 3, 4])
 
+    def test_ordered_crossover_batch(self):
+        """Test that the batched OX reproduces the per-pair children."""
+        parents1 = np.array([[1, 2, 3, 4], [2, 4, 1, 3]])
+        parents2 = np.array([[4, 3, 2, 1], [1, 3, 4, 2]])
+        starts, ends = np.array([1, 0]), np.array([3, 2])
+
+        children1, children2 = codigo.ordered_crossover_batch(parents1, parents2, starts, ends)
+
+        self.assertEqual(children1[0].tolist(), [4, 2, 3, 1])
+        for i in range(2):
+            expected1 = codigo.ox_child(parents1[i].tolist(), parents2[i].tolist(), starts[i], ends[i])
+            expected2 = codigo.ox_child(parents2[i].tolist(), parents1[i].tolist(), starts[i], ends[i])
+            self.assertEqual(children1[i].tolist(), expected1)
+            self.assertEqual(children2[i].tolist(), expected2)
+
     def test_swap_mutation(self):
         """Test the swap mutation."""
         individual = [1, 2, 3, 4]
@@ -80,6 +119,503 @@ class TestGeneticAlgorithmComponents(unittest.TestCase):
         self.assertEqual(sorted(individual), sorted(mutated))
         self.assertEqual(len(set(mutated)), len(individual)) # No duplicates
 
+    def test_swap_mutation_delta(self):
+        """Test that the incremental fitness matches a full re-evaluation."""
+        self.use_random_instance(10)
+        for _ in range(20):
+            individual = codigo.create_individual()
+            fitness = codigo.calculate_fitness(individual)
+            mutated, new_fitness = codigo.swap_mutation_delta(individual, fitness, mutation_rate=0.3)
+            self.assertEqual(new_fitness, codigo.calculate_fitness(mutated))
+
+    def test_tournament_selection_batch(self):
+        """Test that tournaments draw distinct contestants and reject oversized tournaments."""
+        fitnesses = np.arange(20)
+        rng = np.random.default_rng(0)
+        for k in (2, 7, 15, 20):
+            winners = codigo.tournament_selection_batch(fitnesses, 2000, k, rng)
+            self.assertEqual(winners.shape, (2000,))
+            self.assertTrue((winners <= 20 - k).all()) # k distinct contestants include one of the best 21-k
+        self.assertTrue((codigo.tournament_selection_batch(fitnesses, 10, 20, rng) == 0).all())
+        with self.assertRaises(ValueError):
+            codigo.tournament_selection_batch(fitnesses, 10, 21, rng)
+
+    def test_next_generation(self):
+        """Test that the batched stage yields valid tours with up-to-date fitnesses."""
+        self.use_random_instance(10)
+        rng = np.random.default_rng(42)
+        population = codigo.create_population(11, rng)
+        fitnesses = codigo.evaluate_population(population)
+        for _ in range(5):
+            population, fitnesses = codigo.next_generation(population, fitnesses, 2, 3, 0.2, rng)
+        self.assertEqual(population.shape, (11, 9))
+        for individual in population:
+            self.assertEqual(sorted(individual), list(range(1, 10)))
+        np.testing.assert_array_equal(fitnesses, codigo.evaluate_population(population))
+
+    def test_next_generation_double_buffer(self):
+        """Test that writing into spare buffers gives the same generation without touching the inputs."""
+        self.use_random_instance(10)
+        population = codigo.create_population(11, np.random.default_rng(1))
+        fitnesses = codigo.evaluate_population(population)
+        original = population.copy()
+        expected = codigo.next_generation(population, fitnesses, 2, 3, 0.2, np.random.default_rng(42))
+
+        spare = (np.empty_like(population), np.empty_like(fitnesses))
+        result = codigo.next_generation(population, fitnesses, 2, 3, 0.2, np.random.default_rng(42), out=spare,
+                                        scratch=codigo.ScratchBuffers())
+        self.assertIs(result[0], spare[0])
+        self.assertIs(result[1], spare[1])
+        np.testing.assert_array_equal(result[0], expected[0])
+        np.testing.assert_array_equal(result[1], expected[1])
+        np.testing.assert_array_equal(population, original)
+
+    def test_run_ga_seed(self):
+        """Test that runs with the same seed are reproducible."""
+        self.use_random_instance(8)
+        params = self.small_params(generations=10, seed=7)
+        self.assertEqual(codigo.run_ga(params), codigo.run_ga(params))
+
+    def test_execute_runs_worker_independent(self):
+        """Test that parallel execution reproduces the serial results."""
+        self.use_random_instance(8)
+        params = self.small_params()
+        tasks = [('exp', 'a', params), ('exp', 'a', params), ('exp', 'b', params)]
+
+        outcomes = []
+        with tempfile.TemporaryDirectory() as directory:
+            store = codigo.ResultStore(os.path.join(directory, 'runs.jsonl'))
+            codigo.execute_runs(tasks[:1], {'exp': {'a': []}}, workers=1, master_seed=123, store=store)
+            for workers, run_store in ((1, None), (2, None), (2, store)):
+                results = {'exp': {'a': [], 'b': []}}
+                codigo.execute_runs(tasks, results, workers=workers, master_seed=123, store=run_store)
+                outcomes.append([(r['fitness'], r['convergence']) for key in ('a', 'b') for r in results['exp'][key]])
+            self.assertEqual(len(store), 3) # The two missing runs, appended as they completed
+        self.assertEqual(outcomes[0], outcomes[1])
+        self.assertEqual(outcomes[0], outcomes[2])
+
+    def test_migrate_ring(self):
+        """Test that ring migration replaces the worst individual of the next island."""
+        rng = np.random.default_rng(0)
+        island1 = (np.array([[1, 2], [2, 1]]), np.array([5, 9]), rng)
+        island2 = (np.array([[2, 1], [1, 2]]), np.array([7, 8]), rng)
+        codigo.migrate([island1, island2], migrants=1, topology='ring')
+        self.assertEqual(island2[0][1].tolist(), [1, 2])
+        self.assertEqual(island2[1].tolist(), [7, 5])
+        self.assertEqual(island1[1].tolist(), [5, 7])
+
+    def test_run_island_ga(self):
+        """Test that the island model is reproducible for any worker count."""
+        self.use_random_instance(8)
+        params = self.small_params(generations=7, seed=1, islands=3, migration_interval=3, topology='full')
+        serial = codigo.run_island_ga(params, workers=1)
+        parallel = codigo.run_island_ga(params, workers=3)
+        self.assertEqual(serial, parallel)
+        self.assertEqual(len(serial[1]), 7)
+        self.assertLessEqual(serial[0], min(serial[1])) # Elitism keeps the best tour
+        self.assertEqual(serial[3], {'stop_reason': 'generations', 'generations': 7, 'evaluations': 3 * 10 + 7 * 3 * 9})
+
+        # run_ga dispatches on 'islands' and applies the stopping criteria and the cache
+        dispatched = codigo.run_ga(dict(params, island_workers=1))
+        self.assertEqual(dispatched[:3], serial[:3])
+        stopped = codigo.run_ga(dict(params, generations=50, max_evaluations=200, cache_size=100))
+        self.assertEqual(stopped[3]['stop_reason'], 'evaluations')
+        self.assertLessEqual(stopped[3]['evaluations'], 200)
+        self.assertEqual(len(stopped[1]), stopped[3]['generations'] + 1)
+        self.assertEqual(stopped[0], stopped[1][-1])
+        self.assertGreater(stopped[3]['cache_hits'] + stopped[3]['cache_misses'], 0)
+
+    def test_two_opt(self):
+        """Test that 2-opt returns a valid, not longer tour with an exact fitness."""
+        points = np.random.default_rng(3).random((30, 2)) * 100
+        codigo.DISTANCE_MATRIX = np.rint(np.linalg.norm(points[:, None] - points[None], axis=2)).astype(int)
+        codigo.NUM_CITIES = 30
+        neighbors = codigo.nearest_neighbors(5).tolist()
+        individual = codigo.create_individual()
+        fitness = codigo.calculate_fitness(individual)
+
+        tour, improved = codigo.two_opt(individual, fitness, neighbors)
+
+        self.assertEqual(sorted(tour), list(range(1, 30)))
+        self.assertLessEqual(improved, fitness)
+        self.assertEqual(improved, codigo.calculate_fitness(tour))
+
+    def test_coordinate_instance(self):
+        """Test that a TSPLIB coordinate file can replace the distance matrix."""
+        content = ("NAME : square\nTYPE : TSP\nDIMENSION : 4\nEDGE_WEIGHT_TYPE : EUC_2D\n"
+                   "NODE_COORD_SECTION\n1 0 0\n2 3 0\n3 3 4\n4 0 4\nEOF\n")
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'square.tsp')
+            with open(path, 'w') as f:
+                f.write(content)
+            instance = codigo.load_tsplib_coordinates(path, cache_rows=2)
+
+        self.assertEqual(instance.shape, (4, 4))
+        self.assertEqual(instance[0, 2], 5)
+        self.assertEqual(instance[1].tolist(), [3, 0, 4, 5])
+        self.assertEqual(instance[3, 1], 5) # Served by the cached row of city 1
+        self.assertEqual(list(instance._rows), [1]) # Scalar lookups don't fill the cache
+        codigo.DISTANCE_MATRIX = instance
+        codigo.NUM_CITIES = 4
+        self.assertEqual(codigo.calculate_fitness([1, 2, 3]), 14)
+        self.assertEqual(codigo.evaluate_population([[1, 2, 3], [2, 1, 3]]).tolist(), [14, 18])
+
+    def test_fitness_cache(self):
+        """Test that reversed tours share a cache entry and hits are counted."""
+        codigo.DISTANCE_MATRIX = np.array([[0, 1, 2, 3], [1, 0, 4, 5], [2, 4, 0, 6], [3, 5, 6, 0]])
+        codigo.NUM_CITIES = 4
+        self.assertEqual(codigo.tour_key([1, 2, 3]), codigo.tour_key([3, 2, 1]))
+        self.assertNotEqual(codigo.tour_key([1, 2, 3], symmetric=False), codigo.tour_key([3, 2, 1], symmetric=False))
+
+        cache = codigo.FitnessCache(maxsize=10)
+        population = np.array([[1, 2, 3], [3, 2, 1], [2, 1, 3]])
+        np.testing.assert_array_equal(cache.evaluate(population), codigo.evaluate_population(population))
+        cache.evaluate(population)
+        self.assertEqual((cache.hits, cache.misses), (4, 2))
+
+        cache.replace_duplicates(population, np.empty((0, 3), dtype=int), np.random.default_rng(0))
+        self.assertEqual(cache.duplicates_replaced, 1)
+
+    def test_instance_symmetry(self):
+        """Test that symmetry is computed once per instance and follows direct assignments."""
+        asymmetric = np.array([[0, 1, 2], [3, 0, 4], [5, 6, 0]])
+        codigo.set_instance(asymmetric)
+        self.assertFalse(codigo.instance_is_symmetric())
+        codigo.set_instance(asymmetric, symmetric=True) # Trusted without scanning
+        self.assertTrue(codigo.instance_is_symmetric())
+        codigo.DISTANCE_MATRIX = self.test_matrix
+        self.assertTrue(codigo.instance_is_symmetric())
+        codigo.DISTANCE_MATRIX = asymmetric
+        self.assertFalse(codigo.instance_is_symmetric())
+
+    def test_diversity_tracker(self):
+        """Test that incrementally updated hashes match a full rehash."""
+        self.use_random_instance(10)
+        rng = np.random.default_rng(5)
+        tracker = codigo.DiversityTracker(10, symmetric=False)
+        population = codigo.create_population(12, rng)
+        fitnesses = codigo.evaluate_population(population)
+        tracker.reset(population)
+        for _ in range(5):
+            population, fitnesses = codigo.next_generation(population, fitnesses, 2, 3, 0.3, rng,
+                                                           tracker=tracker)
+            np.testing.assert_array_equal(tracker.hashes, tracker.hash_population(population))
+            self.assertEqual(tracker.distinct(), len(np.unique(population, axis=0)))
+
+        identical = np.tile(population[:1], (4, 1))
+        self.assertEqual(tracker.edge_statistics(identical), (0.0, 0.0))
+
+    def test_stopping_criteria(self):
+        """Test stagnation, relative-improvement and evaluation-budget stops."""
+        stopping = codigo.StoppingCriteria({'patience': 2, 'min_improvement': 0.1})
+        self.assertIsNone(stopping.check(100, 0))
+        self.assertIsNone(stopping.check(95, 0)) # Less than 10% better: stagnant
+        self.assertEqual(stopping.check(94, 0), 'stagnation')
+
+        self.use_random_instance(8)
+        params = self.small_params(elite_perc=0.2, generations=50, seed=1, max_evaluations=50)
+        best, convergence, _, stats = codigo.run_ga(params)
+        self.assertEqual(stats['stop_reason'], 'evaluations')
+        self.assertEqual(stats['generations'], 5) # 10 initial + 5 * 8 children
+        self.assertEqual(len(convergence), stats['generations'] + 1)
+        self.assertLessEqual(stats['evaluations'], 50)
+
+    def test_execute_runs_resumes_from_store(self):
+        """Test that completed runs are persisted and not executed again."""
+        self.use_random_instance(8)
+        params = self.small_params()
+        tasks = [('exp', 'a', params), ('exp', 'a', params)]
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'runs.jsonl')
+            first = {'exp': {'a': []}}
+            codigo.execute_runs(tasks, first, workers=1, master_seed=3, store=codigo.ResultStore(path))
+
+            original_run_ga = codigo.run_ga
+            codigo.run_ga = None # Any execution would fail
+            try:
+                second = {'exp': {'a': []}}
+                store = codigo.ResultStore(path)
+                codigo.execute_runs(tasks, second, workers=1, master_seed=3, store=store)
+            finally:
+                codigo.run_ga = original_run_ga
+
+        self.assertEqual(len(store), 2)
+        self.assertEqual([r['fitness'] for r in first['exp']['a']], [r['fitness'] for r in second['exp']['a']])
+
+    def test_result_store_torn_line(self):
+        """Test that a record appended after a crash mid-write survives the next load."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'runs.jsonl')
+            codigo.ResultStore(path).append('a', {'fitness': 1})
+            with open(path, 'a') as f:
+                f.write('{"key": "b", "rec') # Crash while writing the second record
+            store = codigo.ResultStore(path)
+            self.assertEqual(len(store), 1)
+            store.append('c', {'fitness': 3})
+
+            reloaded = codigo.ResultStore(path)
+            self.assertIn('a', reloaded)
+            self.assertIn('c', reloaded)
+            self.assertNotIn('b', reloaded)
+            self.assertEqual(reloaded.get('c'), {'fitness': 3})
+            self.assertEqual(reloaded.get('a'), {'fitness': 1}) # Read back from its offset
+            self.assertEqual(store.get('c'), reloaded.get('c'))
+            self.assertIsNone(reloaded.get('b'))
+
+    def test_config_results_streaming(self):
+        """Test the online aggregates against numpy on the raw traces."""
+        traces = [[5.0, 4.0, 3.0], [6.0, 2.0], [9.0, 8.0, 1.0]]
+        padded = np.array([[5.0, 4.0, 3.0], [6.0, 2.0, 2.0], [9.0, 8.0, 1.0]])
+        with tempfile.TemporaryDirectory() as directory:
+            config = codigo.ConfigResults(3, 'test', spill_dir=directory)
+            for i, trace in enumerate(traces):
+                config.append({'fitness': trace[-1], 'time': 0.1, 'convergence': trace,
+                               'diversity': [3] * len(trace)})
+            np.testing.assert_allclose(config.convergence.mean, padded.mean(axis=0))
+            np.testing.assert_allclose(config.convergence.std, padded.std(axis=0))
+            np.testing.assert_allclose(config.convergence.min, padded.min(axis=0))
+            np.testing.assert_allclose(config.convergence.quantile(0.5), np.median(padded, axis=0))
+            np.testing.assert_array_equal(config.spills['convergence'].read(), padded)
+            self.assertEqual(config.fitnesses, [3.0, 2.0, 1.0])
+
+            # A new sweep (or a resumed one) rewrites the spills instead of appending to them
+            again = codigo.ConfigResults(2, 'test', spill_dir=directory)
+            again.append({'fitness': 1.0, 'time': 0.1, 'convergence': [2.0, 1.0], 'diversity': [3, 3]})
+            np.testing.assert_array_equal(again.spills['convergence'].read(), [[2.0, 1.0]])
+            self.assertEqual(again.spills['diversity'].read().shape, (1, 2))
+
+    def test_expand_sweep(self):
+        """Test the grid, one-factor-at-a-time and Latin hypercube designs."""
+        factors = {'pop_size': [20, 50], 'tournament_size': [2, 3, 5]}
+        grid = codigo.expand_sweep({'name': 'g', 'design': 'grid', 'factors': factors})
+        self.assertEqual(len(grid), 6)
+        self.assertIn('pop_size=50_tournament_size=5', dict(grid))
+
+        ofat = codigo.expand_sweep({'name': 'o', 'design': 'ofat', 'factors': factors})
+        self.assertEqual(len(ofat), 4) # pop_size=50 and tournament_size=3 is the base config twice
+        self.assertTrue(all(p['mutation_rate'] == codigo.BASE_PARAMS['mutation_rate'] for _, p in ofat))
+
+        lhs = codigo.expand_sweep({'name': 'l', 'design': 'lhs', 'samples': 4,
+                                   'factors': {'mutation_rate': {'low': 0.0, 'high': 0.2}}})
+        strata = sorted(int(p['mutation_rate'] / 0.05) for _, p in lhs)
+        self.assertEqual(strata, [0, 1, 2, 3]) # One sample per stratum
+
+        labels = [label for label, _ in codigo.expand_sweep(codigo.EXPERIMENTS[1])]
+        self.assertEqual(labels, ['mut_1', 'mut_5', 'mut_10', 'mut_20'])
+        self.assertNotIn(codigo.SEEDING_EXPERIMENT, codigo.EXPERIMENTS) # Opt-in through specs=
+        labels = [label for label, _ in codigo.expand_sweep(codigo.SEEDING_EXPERIMENT)]
+        self.assertEqual(labels, ['seed_0', 'seed_10', 'seed_50'])
+
+    def test_successive_halving(self):
+        """Test that successive halving promotes the best configurations and ranks all of them."""
+        self.use_random_instance(12)
+        base = dict(codigo.BASE_PARAMS, pop_size=20, elite_perc=0.1)
+        configs = [('good', dict(base, mutation_rate=0.05)),
+                   ('random', dict(base, elite_perc=0.0, mutation_rate=1.0, tournament_size=1)),
+                   ('mid', dict(base, mutation_rate=0.3))]
+        ranking = codigo.successive_halving(configs, runs=3, min_generations=5,
+                                            max_generations=20, workers=1, bootstrap=200)
+        self.assertEqual(sorted(r['label'] for r in ranking), ['good', 'mid', 'random'])
+        self.assertEqual(ranking[-1]['label'], 'random')
+        self.assertEqual(ranking[-1]['generations'], 5) # Dropped at the first rung
+        self.assertEqual(ranking[0]['generations'], 10) # One winner left after the second rung
+        self.assertAlmostEqual(sum(r.get('p_best', 0.0) for r in ranking), 1.0)
+
+    def test_run_ga_instrumentation(self):
+        """Test per-phase timings, peak memory and the profile dump, without changing the run."""
+        self.use_random_instance(12)
+        params = dict(codigo.BASE_PARAMS, pop_size=20, generations=10, seed=3)
+        plain = codigo.run_ga(params)
+        self.assertNotIn('phase_times', plain[3])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'run_{run}.prof')
+            result = codigo.run_ga(dict(params, profile_phases=True, trace_memory=True, profile_path=path))
+            self.assertEqual(len(os.listdir(tmp)), 1)
+        self.assertEqual(result[0], plain[0])
+        self.assertEqual(result[1], plain[1])
+        stats = result[3]
+        self.assertEqual(set(stats['phase_times']), set(codigo.PhaseTimer.PHASES))
+        self.assertTrue(all(len(times) == 10 for times in stats['phase_times'].values()))
+        self.assertGreater(stats['phase_totals']['crossover'], 0)
+        self.assertEqual(stats['phase_totals']['local_search'], 0)
+        self.assertGreater(stats['peak_memory'], 0)
+
+    def test_run_ga_steady_state(self):
+        """Test the steady-state mode: monotone convergence per generation-equivalent, same accounting."""
+        self.use_random_instance(12)
+        params = dict(codigo.BASE_PARAMS, pop_size=20, elite_perc=0.1, generations=15, seed=5,
+                      mode='steady_state', offspring_per_step=3)
+        best, convergence, diversity, stats = codigo.run_ga(params)
+        self.assertEqual(len(convergence), 15)
+        self.assertTrue(all(a >= b for a, b in zip(convergence, convergence[1:])))
+        self.assertLessEqual(best, convergence[-1])
+        self.assertTrue(all(1 <= d <= 20 for d in diversity))
+        self.assertEqual(stats['evaluations'], 20 + 15 * 18) # Same budget as 15 generations of run_ga
+        self.assertEqual(codigo.run_ga(params)[1], convergence)
+
+        with self.assertRaises(ValueError):
+            codigo.run_ga(dict(params, mode='unknown'))
+        with self.assertRaises(ValueError):
+            codigo.run_ga(dict(params, local_search='elites'))
+
+    def test_held_karp(self):
+        """Test the exact solver against brute force and the per-instance cache of the optimum."""
+        self.assertEqual(codigo.held_karp()[0], 60) # Both directions of the 3-city cycle
+        matrix = np.random.default_rng(0).integers(1, 100, (7, 7)) # Asymmetric
+        brute_force = min(sum(matrix[a, b] for a, b in zip((0,) + tour, tour + (0,)))
+                          for tour in itertools.permutations(range(1, 7)))
+        optimum, tour = codigo.held_karp(matrix)
+        self.assertEqual(optimum, brute_force)
+        self.assertEqual(sorted(tour), list(range(1, 7)))
+        codigo.set_instance(matrix)
+        self.assertEqual(codigo.calculate_fitness(tour), optimum)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertEqual(codigo.optimal_tour_length(matrix, cache_dir=tmp), optimum)
+            codigo._OPTIMA.clear()
+            with open(os.path.join(tmp, 'optima.json')) as f:
+                self.assertEqual(list(json.load(f).values()), [optimum])
+            self.assertEqual(codigo.optimal_tour_length(matrix, cache_dir=tmp), optimum)
+
+        with self.assertRaises(ValueError):
+            codigo.held_karp(np.zeros((codigo.HELD_KARP_LIMIT + 1,) * 2))
+
+    def test_held_karp_bound(self):
+        """Test that the 1-tree bound is a valid lower bound and can stop a run."""
+        rng = np.random.default_rng(0)
+        symmetric = np.triu(rng.integers(1, 100, (9, 9)), 1)
+        symmetric += symmetric.T
+        asymmetric = rng.integers(1, 100, (9, 9))
+        coordinates = codigo.CoordinateInstance(rng.uniform(0, 100, (9, 2)))
+        for matrix in (symmetric, asymmetric, coordinates):
+            bound = codigo.held_karp_bound(matrix)
+            optimum = codigo.held_karp(matrix)[0]
+            self.assertLessEqual(bound, optimum)
+            self.assertGreater(bound, 0.5 * optimum)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertEqual(codigo.lower_bound(symmetric, cache_dir=tmp), codigo.held_karp_bound(symmetric))
+
+        codigo.set_instance(symmetric)
+        optimum = codigo.held_karp(symmetric)[0]
+        params = dict(codigo.BASE_PARAMS, pop_size=30, generations=300, seed=1,
+                      local_search='offspring', lower_bound=optimum)
+        stats = codigo.run_ga(params)[3]
+        self.assertEqual(stats['stop_reason'], 'bound') # The optimum was reached
+        self.assertLess(stats['generations'], 300)
+        self.assertEqual(stats['gap_to_bound'], 0)
+
+    def test_seeding_heuristics(self):
+        """Test the constructive tours and the seeded share of the initial population."""
+        codigo.DISTANCE_MATRIX = np.array([
+            [0, 1, 9, 9, 1],
+            [1, 0, 1, 9, 9],
+            [9, 1, 0, 1, 9],
+            [9, 9, 1, 0, 1],
+            [1, 9, 9, 1, 0]
+        ])
+        codigo.NUM_CITIES = 5
+        optimum = 5 # The ring 0-1-2-3-4-0
+        np.testing.assert_array_equal(codigo.nearest_neighbor_tours([0, 2]), [[1, 2, 3, 4], [4, 3, 2, 1]])
+        self.assertEqual(codigo.calculate_fitness(list(codigo.greedy_edge_tour(k=2))), optimum)
+        self.assertIsNone(codigo.space_filling_curve_tour())
+        self.assertEqual(len(codigo.seeded_tours(3, np.random.default_rng(0))), 1) # Every heuristic finds the ring
+
+        grid = np.array([(x, y) for x in range(4) for y in range(4)])
+        path = grid[np.argsort(codigo.hilbert_index(grid, order=2))]
+        self.assertTrue(np.all(np.abs(np.diff(path, axis=0)).sum(axis=1) == 1)) # A continuous curve
+
+        codigo.set_instance(codigo.CoordinateInstance(np.random.default_rng(0).uniform(0, 100, (30, 2))))
+        population = codigo.create_population(20, np.random.default_rng(1), seed_fraction=0.25)
+        for individual in population:
+            self.assertEqual(sorted(individual), list(range(1, 30)))
+        fitnesses = codigo.evaluate_population(population)
+        self.assertLess(fitnesses[:5].max(), fitnesses[5:].min())
+
+    def test_compact_distance_storage(self):
+        """Test narrow dtypes and the condensed layout against the dense int64 matrix."""
+        self.assertEqual(codigo.narrowest_dtype(self.test_matrix), np.int16)
+        self.assertEqual(codigo.narrowest_dtype(np.array([[0.0, 70000.0], [70000.0, 0.0]])), np.int32)
+        self.assertEqual(codigo.narrowest_dtype(np.array([[0.0, 1.5], [1.5, 0.0]])), np.float32)
+        self.assertEqual(codigo.narrowest_dtype(np.array([[0.0, 0.1], [0.1, 0.0]])), np.float64)
+
+        rng = np.random.default_rng(0)
+        matrix = np.triu(rng.integers(20000, 32000, (9, 9)), 1) # Route lengths overflow int16
+        matrix += matrix.T
+        condensed = codigo.compact_distance_matrix(matrix, condensed=True)
+        self.assertIsInstance(condensed, codigo.CondensedMatrix)
+        self.assertEqual(condensed.dtype, np.int16)
+        np.testing.assert_array_equal(np.asarray(condensed), matrix)
+        np.testing.assert_array_equal(condensed[3], matrix[3])
+        np.testing.assert_array_equal(condensed[2:5], matrix[2:5])
+        self.assertEqual(condensed[7, 2], matrix[7, 2])
+        self.assertEqual(codigo.instance_fingerprint(condensed), codigo.instance_fingerprint(matrix))
+        fingerprint, block_bytes = codigo.instance_fingerprint(matrix), codigo.FINGERPRINT_BLOCK_BYTES
+        try:
+            codigo.FINGERPRINT_BLOCK_BYTES = 1 # One row at a time hashes the same bytes
+            self.assertEqual(codigo.instance_fingerprint(condensed), fingerprint)
+            self.assertEqual(codigo.instance_fingerprint(matrix.astype(np.int16)), fingerprint)
+        finally:
+            codigo.FINGERPRINT_BLOCK_BYTES = block_bytes
+        self.assertIsInstance(codigo.compact_distance_matrix(rng.integers(1, 9, (3, 3)), condensed=True),
+                              np.ndarray) # Asymmetric matrices stay dense
+
+        codigo.set_instance(matrix)
+        population = codigo.create_population(6, rng)
+        outcomes = []
+        for instance in (matrix, condensed, codigo.compact_distance_matrix(matrix)):
+            codigo.set_instance(instance)
+            individual = [int(city) for city in population[0]]
+            fitness = codigo.calculate_fitness(individual)
+            self.assertEqual(fitness, codigo.evaluate_population(population)[0])
+            delta = codigo.swap_with_delta(individual, 0, 5)
+            self.assertEqual(fitness + delta, codigo.calculate_fitness(individual))
+            params = dict(codigo.BASE_PARAMS, pop_size=10, generations=5, seed=1, local_search='offspring')
+            outcomes.append(codigo.run_ga(params)[:2])
+        self.assertEqual(outcomes[0], outcomes[1])
+        self.assertEqual(outcomes[0], outcomes[2])
+
+    def test_array_tour_and_or_opt(self):
+        """Test ArrayTour against a plain list and Or-opt on a random Euclidean instance."""
+        rng = np.random.default_rng(0)
+        for n in (3, 4, 7, 10):
+            cities = [int(city) for city in rng.permutation(n)]
+            tour, naive = codigo.ArrayTour(cities), list(cities)
+            for _ in range(30):
+                a, b = (int(city) for city in rng.choice(n, 2))
+                i, length = naive.index(a), (naive.index(b) - naive.index(a)) % n + 1
+                path = [naive[(i + k) % n] for k in range(length)][::-1]
+                for k in range(length):
+                    naive[(i + k) % n] = path[k]
+                tour.reverse(a, b)
+                depot = naive.index(0)
+                self.assertEqual(tour.to_individual(), naive[depot + 1:] + naive[:depot])
+                for k, city in enumerate(naive):
+                    self.assertEqual(tour.next(city), naive[(k + 1) % n])
+                    self.assertEqual(tour.prev(city), naive[k - 1])
+                self.assertTrue(tour.between(naive[1], naive[2], naive[0]))
+                self.assertFalse(tour.between(naive[0], naive[n - 1], naive[n - 2]))
+
+        points = rng.uniform(0, 1000, (60, 2))
+        matrix = np.rint(np.linalg.norm(points[:, None] - points[None], axis=2)).astype(int)
+        codigo.set_instance(matrix)
+        neighbors = codigo.nearest_neighbors(8).tolist()
+        individual = codigo.create_individual()
+        fitness = codigo.calculate_fitness(individual)
+        two_opt_tour, two_opt_fitness = codigo.two_opt(individual, fitness, neighbors)
+        for tour, tour_fitness in (codigo.or_opt(individual, fitness, neighbors),
+                                   codigo.local_search_tour(individual, fitness, neighbors, use_or_opt=True)):
+            self.assertEqual(sorted(tour), list(range(1, 60)))
+            self.assertEqual(tour_fitness, codigo.calculate_fitness(tour))
+            self.assertLess(tour_fitness, fitness)
+        self.assertLessEqual(tour_fitness, two_opt_fitness)
+
+        params = dict(codigo.BASE_PARAMS, pop_size=10, generations=3, seed=0,
+                      local_search='offspring', ls_or_opt=True)
+        self.assertLessEqual(codigo.run_ga(params)[0], codigo.run_ga(dict(params, ls_or_opt=False))[0])
+
     def test_create_individual(self):
         """Smoke test to ensure create_individual returns a valid permutation."""
         codigo.NUM_CITIES = 10
@@ -99,5 +635,27 @@ class TestGeneticAlgorithmComponents(unittest.TestCase):
         # Check that it's actually the fallback matrix by checking a known value
         self.assertEqual(matrix[0, 1], 20)
 
+    def test_load_matrix_from_cache(self):
+        """Test that cached instances are memory-mapped and used when the download fails."""
+        url = "http://127.0.0.1:1/cached"
+        with tempfile.TemporaryDirectory() as cache_dir:
+            self.assertIsNone(codigo.load_cached_matrix(url, cache_dir))
+            codigo.store_cached_matrix(url, b"[[0, 7], [7, 0]]", np.array([[0, 7], [7, 0]]), cache_dir)
+
+            matrix = codigo.load_distance_matrix(url, cache_dir=cache_dir)
+            self.assertIsInstance(matrix, np.memmap)
+            self.assertEqual(matrix.dtype, np.int16) # Compacted once, into its own file
+            self.assertEqual(matrix.tolist(), [[0, 7], [7, 0]])
+            with open(os.path.join(cache_dir, 'index.json')) as f:
+                entry = json.load(f)[url]
+            original = np.load(os.path.join(cache_dir, entry['file']))
+            self.assertEqual(original.dtype, np.array([7]).dtype) # The shared file keeps its dtype
+            self.assertNotEqual(entry['compact'], entry['file'])
+
+            # A failed refresh falls back to the cache before the 5-city matrix
+            matrix = codigo.load_distance_matrix(url, timeout=1, cache_dir=cache_dir, refresh=True)
+            self.assertEqual(matrix.shape, (2, 2))
+            del matrix
+
 if __name__ == '__main__':
     unittest.main()